@@ -0,0 +1,115 @@
+# bench_battery_env.py
+"""
+Steps per second of the RL BatteryEnv (src/ai-pocs/battery_env.py).
+
+Runs episodes with random actions on an archived price file and reports
+env steps per second and reset time. With --compare-rev the BatteryEnv of
+an earlier git revision is loaded with `git show` and measured on the same
+actions, and the rewards of both are checked to agree. With --n-envs the
+batched VecEnv (batched_battery_env.py) is measured as well.
+
+Requires gymnasium (and stable-baselines3 for --n-envs, see requirements.txt).
+
+Usage:
+    python benchmarks/bench_battery_env.py [--steps 200000] [--compare-rev HEAD~1]
+                                           [--n-envs 256 4096]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import types
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AI_POCS_DIR = os.path.join(REPO_ROOT, "src", "ai-pocs")
+sys.path.insert(0, AI_POCS_DIR)
+
+from battery_env import BatteryEnv  # noqa: E402
+
+
+def load_env_class(revision):
+    """BatteryEnv as of git `revision`."""
+    source = subprocess.run(
+        ["git", "show", f"{revision}:src/ai-pocs/battery_env.py"], cwd=REPO_ROOT,
+        capture_output=True, text=True, check=True).stdout
+    module = types.ModuleType(f"battery_env_{revision}")
+    exec(compile(source, f"battery_env.py@{revision}", "exec"), module.__dict__)
+    return module.BatteryEnv
+
+
+def run(env_class, price_path, steps, seed):
+    """
+    Returns:
+        tuple: (steps per second, mean reset microseconds, rewards)
+    """
+    env = env_class(price_path)
+    rng = np.random.default_rng(seed)
+    actions = rng.uniform(-1, 1, (steps, 1)).astype(np.float32)
+    # Same max change rate per episode for every revision, whichever RNG
+    # its reset() draws from
+    change_rates = iter(rng.uniform(0.1, 0.5, steps))
+    rewards = np.empty(steps)
+    reset_s = 0.0
+    resets = 0
+    start_time = time.perf_counter()
+    start_reset = time.perf_counter()
+    env.reset()
+    reset_s += time.perf_counter() - start_reset
+    env.max_change_rate = next(change_rates)
+    for i in range(steps):
+        _, rewards[i], done, _, _ = env.step(actions[i])
+        if done:
+            start_reset = time.perf_counter()
+            env.reset()
+            reset_s += time.perf_counter() - start_reset
+            env.max_change_rate = next(change_rates)
+            resets += 1
+    elapsed = time.perf_counter() - start_time
+    return steps / elapsed, reset_s / (resets + 1) * 1e6, rewards
+
+
+def run_batched(price_path, n_envs, steps, seed):
+    """Env steps (summed over all episodes) per second of BatchedBatteryEnv."""
+    from batched_battery_env import BatchedBatteryEnv
+
+    env = BatchedBatteryEnv(price_path, n_envs, seed=seed)
+    env.reset()
+    batches = max(steps // n_envs, 1)
+    actions = np.random.default_rng(seed).uniform(-1, 1, (batches, n_envs, 1)).astype(np.float32)
+    start_time = time.perf_counter()
+    for batch in actions:
+        env.step_async(batch)
+        env.step_wait()
+    return batches * n_envs / (time.perf_counter() - start_time)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--steps", type=int, default=200_000)
+    parser.add_argument("--price-file", default=os.path.join(REPO_ROOT, "data", "electricity_prices.json"))
+    parser.add_argument("--compare-rev", help="Git revision of the baseline BatteryEnv")
+    parser.add_argument("--n-envs", type=int, nargs="*", default=[],
+                        help="Episode counts for BatchedBatteryEnv")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rate, reset_us, rewards = run(BatteryEnv, args.price_file, args.steps, args.seed)
+    print(f"{'current':<12} {rate:>10.0f} steps/s {reset_us:>8.1f} us/reset")
+    if args.compare_rev:
+        baseline_rate, baseline_reset_us, baseline_rewards = run(
+            load_env_class(args.compare_rev), args.price_file, args.steps, args.seed)
+        print(f"{args.compare_rev:<12} {baseline_rate:>10.0f} steps/s "
+              f"{baseline_reset_us:>8.1f} us/reset")
+        print(f"speedup {rate / baseline_rate:.1f}x, max reward difference "
+              f"{np.max(np.abs(rewards - baseline_rewards)):.2e}")
+    for n_envs in args.n_envs:
+        batched_rate = run_batched(args.price_file, n_envs, args.steps, args.seed)
+        print(f"{f'batched x{n_envs}':<12} {batched_rate:>10.0f} steps/s "
+              f"({batched_rate / rate:.1f}x the single env)")
+
+
+if __name__ == "__main__":
+    main()
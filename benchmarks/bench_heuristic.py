@@ -0,0 +1,129 @@
+# bench_heuristic.py
+"""
+Savings and latency of the greedy heuristic engine versus the MILP.
+
+Runs both engines on every archived price file under data/ and on random
+forecasts with negative prices, for a few battery configurations, start SOCs
+and start indices, and reports per forecast how much of the MILP savings the
+heuristic keeps and how much faster it is (scheduling only, forecast parsing
+excluded).
+
+Usage:
+    python benchmarks/bench_heuristic.py [--backend highs|cbc] [--repeats 20]
+                                         [--negative-trials 10]
+"""
+import argparse
+import glob
+import itertools
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+
+from linear_optimizer import prepare_problem, solve_problem  # noqa: E402
+from heuristic_optimizer import greedy_schedule  # noqa: E402
+
+BATTERY_PARAMS = [
+    {'capacity_kwh': 7.4, 'max_charge_rate_kw': 1.2, 'max_discharge_rate_kw': 0.8,
+     'min_soc_percent': 10, 'efficiency_roundtrip': 0.90},
+    {'capacity_kwh': 10.0, 'max_charge_rate_kw': 2.0, 'max_discharge_rate_kw': 0.5,
+     'min_soc_percent': 15, 'efficiency_roundtrip': 0.88},
+    {'capacity_kwh': 7.6, 'max_charge_rate_kw': 1.2, 'max_discharge_rate_kw': 1.2,
+     'min_soc_percent': 5, 'efficiency_roundtrip': 0.94},
+]
+INITIAL_SOCS = (0, 33, 80)
+START_INDICES = (0, 5, 18)
+
+
+def best_time(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def negative_price_forecasts(trials, steps=50, seed=0):
+    """
+    Random `steps` step forecasts shifted so that part of every day is below
+    zero (as Tibber prices are on sunny, windy days), one per trial.
+    """
+    rng = random.Random(seed)
+    forecasts = []
+    for trial in range(trials):
+        prices = [rng.uniform(0.0, 0.4) - 0.25 for _ in range(steps)]
+        forecasts.append((f"negative prices, trial {trial}", json.dumps({"data": [
+            {"index": i, "hour": i % 24, "date": "2025-02-15", "adjustedPrice": price}
+            for i, price in enumerate(prices)
+        ]})))
+    return forecasts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", default=None, help="highs or cbc")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--negative-trials", type=int, default=10,
+                        help="Random forecasts with negative prices")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    paths = sorted(glob.glob(os.path.join(REPO_ROOT, "data", "**", "electricity_prices*"),
+                             recursive=True))
+    forecasts = []
+    for path in paths:
+        with open(path) as f:
+            forecasts.append((os.path.relpath(path, REPO_ROOT), f.read()))
+    archived = len(forecasts)
+    forecasts += negative_price_forecasts(args.negative_trials)
+
+    print(f"{'forecast':<60} {'cases':>5} {'milp':>8} {'heur':>8} {'kept %':>7} "
+          f"{'worst %':>7} {'milp ms':>8} {'heur us':>8} {'speedup':>8}")
+    groups = {"archived files": [], "negative prices": []}
+    for position, (name, forecast_json) in enumerate(forecasts):
+        rows = []
+        for params, soc, index in itertools.product(BATTERY_PARAMS, INITIAL_SOCS, START_INDICES):
+            problem, error = prepare_problem(forecast_json, soc, index, params)
+            if error:
+                continue
+            result = solve_problem(problem, args.backend)
+            if result.objective is None:
+                continue
+            charges, discharges, _ = greedy_schedule(problem)
+            heuristic_savings = float(sum(
+                (d - c) * p for c, d, p in zip(charges, discharges, problem.prices)))
+            milp_s = best_time(lambda: solve_problem(problem, args.backend),
+                               max(1, args.repeats // 10))
+            heuristic_s = best_time(lambda: greedy_schedule(problem), args.repeats)
+            rows.append((result.objective, heuristic_savings, milp_s, heuristic_s))
+        if rows:
+            print_row(name, rows)
+            groups["archived files" if position < archived else "negative prices"] += rows
+
+    for name, rows in groups.items():
+        if rows:
+            print_row(f"all {name}", rows)
+
+
+def print_row(name, rows):
+    """Rows are (milp savings, heuristic savings, milp seconds, heuristic seconds)."""
+    milp_total = sum(r[0] for r in rows)
+    heuristic_total = sum(r[1] for r in rows)
+    worst = min((r[1] / r[0] if r[0] > 1e-9 else 1.0) for r in rows)
+    milp_ms = statistics.median(r[2] for r in rows) * 1000
+    heuristic_us = statistics.median(r[3] for r in rows) * 1e6
+    print(f"{name:<60} {len(rows):>5} {milp_total:>8.3f} "
+          f"{heuristic_total:>8.3f} {heuristic_total / milp_total * 100:>6.2f}% "
+          f"{worst * 100:>6.2f}% {milp_ms:>8.2f} {heuristic_us:>8.0f} "
+          f"{milp_ms * 1000 / heuristic_us:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# bench_horizon_compression.py
+"""
+Compression ratio, solve time and objective loss of horizon compression.
+
+For every price tolerance, merges adjacent steps of multi-day forecasts built
+from the archived prices in data/ (see bench_step_resolution.py), solves the
+reduced MILP, expands it back to per-step actions and compares the savings
+with the uncompressed solve.
+
+Usage:
+    python benchmarks/bench_horizon_compression.py [--tolerances 0.005 0.01 0.02]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+
+from linear_optimizer import (  # noqa: E402
+    compress_problem, prepare_problem, solve_compressed, solve_problem)
+from bench_step_resolution import (  # noqa: E402
+    BATTERY_PARAMS, INITIAL_SOCS, load_daily_prices, make_forecast)
+
+CASES = ((1, 60), (3, 60), (3, 15))  # (days, step minutes)
+
+
+def timed(solve, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = solve()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tolerances", type=float, nargs="+",
+                        default=[0.002, 0.005, 0.01, 0.02])
+    parser.add_argument("--backend", default=None, help="highs or cbc")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    daily_prices = load_daily_prices()
+    print(f"{'days':>4} {'step':>5} {'tol':>6} {'T':>4} {'T_c':>4} {'ratio':>6} "
+          f"{'full ms':>8} {'comp ms':>8} {'savings':>8} {'loss':>8} {'loss %':>7}")
+    for days, step_minutes in CASES:
+        forecast_json = make_forecast(daily_prices, days, step_minutes)
+        params = dict(BATTERY_PARAMS, step_hours=step_minutes / 60.0)
+        for tolerance in args.tolerances:
+            rows = []
+            for soc in INITIAL_SOCS:
+                problem, _ = prepare_problem(forecast_json, soc, 0, params)
+                compressed, _ = compress_problem(problem, tolerance)
+                # Untimed solves build the model templates
+                solve_problem(problem, args.backend)
+                solve_compressed(problem, tolerance, args.backend)
+                full_s, full = timed(lambda: solve_problem(problem, args.backend), args.repeats)
+                comp_s, comp = timed(
+                    lambda: solve_compressed(problem, tolerance, args.backend), args.repeats)
+                rows.append((problem.horizon, compressed.horizon, full_s, comp_s,
+                             full.objective, full.objective - comp.objective))
+            horizon, compressed_horizon = rows[0][0], statistics.mean(r[1] for r in rows)
+            savings = statistics.mean(r[4] for r in rows)
+            loss = statistics.mean(r[5] for r in rows)
+            print(f"{days:>4} {step_minutes:>4}m {tolerance:>6} {horizon:>4} "
+                  f"{compressed_horizon:>4.0f} {horizon / compressed_horizon:>6.2f} "
+                  f"{statistics.mean(r[2] for r in rows) * 1000:>8.1f} "
+                  f"{statistics.mean(r[3] for r in rows) * 1000:>8.1f} "
+                  f"{savings:>8.4f} {loss:>8.4f} {loss / savings * 100 if savings else 0.0:>6.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# bench_policy_inference.py
+"""
+Startup time, peak RSS and per-prediction latency of the RL inference backends.
+
+Compares the two policies inference_api.py can serve with:
+  sb3    PPO.load() of the saved model and model.predict (imports torch)
+  numpy  NumpyPolicy.load() of the exported .npz (numpy_policy.py)
+
+Startup is measured in a fresh interpreter per backend (imports plus model
+load, wall time of the whole process and its max RSS). Latency is of single
+deterministic predictions on random observations within the BatteryEnv
+observation bounds, as /infer_change_rate makes them; with both backends
+the largest difference between their actions is reported as well.
+
+If the .npz does not exist yet it is exported from the model first.
+Requires stable-baselines3 for the sb3 backend and the export.
+
+Usage:
+    python benchmarks/bench_policy_inference.py [--model data/models/battery_rl_model_v0_3]
+                                                [--policy model.npz] [--predictions 2000]
+                                                [--backends sb3 numpy]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AI_POCS_DIR = os.path.join(REPO_ROOT, "src", "ai-pocs")
+sys.path.insert(0, AI_POCS_DIR)
+
+LOADERS = {
+    "sb3": "from stable_baselines3 import PPO\nmodel = PPO.load({path!r})",
+    "numpy": "from numpy_policy import NumpyPolicy\nmodel = NumpyPolicy.load({path!r})",
+}
+
+STARTUP_SCRIPT = """
+import json, resource, sys
+sys.path.insert(0, {ai_pocs_dir!r})
+{loader}
+print(json.dumps({{"maxrss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+
+def load(backend, path):
+    namespace = {}
+    exec(LOADERS[backend].format(path=path), namespace)
+    return namespace["model"]
+
+
+def measure_startup(backend, path, repeats):
+    """
+    Returns:
+        tuple: (median seconds to start the interpreter and load the model,
+                max RSS in MB)
+    """
+    script = STARTUP_SCRIPT.format(
+        ai_pocs_dir=AI_POCS_DIR, loader=LOADERS[backend].format(path=path))
+    durations = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+        durations.append(time.perf_counter() - start_time)
+    maxrss_kb = json.loads(output.strip().splitlines()[-1])["maxrss_kb"]
+    return float(np.median(durations)), maxrss_kb / 1024
+
+
+def random_observations(observation_shape, count, seed):
+    """Observations within the BatteryEnv bounds (SOC, rate, step, prices, mask)."""
+    rng = np.random.default_rng(seed)
+    observations = rng.uniform(0, 1, (count,) + tuple(observation_shape)).astype(np.float32)
+    max_data_points = (observation_shape[0] - 3) // 2
+    observations[:, 2] = rng.integers(0, max_data_points, count)
+    observations[:, 3 + max_data_points:] = 1.0
+    return observations
+
+
+def measure_latency(model, observations):
+    """
+    Returns:
+        tuple: (p50 microseconds, p99 microseconds, actions)
+    """
+    model.predict(observations[0], deterministic=True)  # Warm up
+    durations = np.empty(len(observations))
+    actions = []
+    for i, observation in enumerate(observations):
+        start_time = time.perf_counter()
+        action, _ = model.predict(observation, deterministic=True)
+        durations[i] = time.perf_counter() - start_time
+        actions.append(action)
+    return np.percentile(durations, 50) * 1e6, np.percentile(durations, 99) * 1e6, np.array(actions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model", default=os.path.join(REPO_ROOT, "data", "models", "battery_rl_model_v0_3"))
+    parser.add_argument("--policy", help="Exported .npz (default: <model>.npz)")
+    parser.add_argument("--predictions", type=int, default=2000)
+    parser.add_argument("--startup-repeats", type=int, default=3)
+    parser.add_argument("--backends", nargs="+", choices=sorted(LOADERS), default=["sb3", "numpy"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    policy_path = args.policy or f"{args.model}.npz"
+    paths = {"sb3": args.model, "numpy": policy_path}
+    if "numpy" in args.backends and not os.path.exists(policy_path):
+        from export_policy import export_policy
+
+        export_policy(load("sb3", args.model), policy_path)
+
+    models = {backend: load(backend, paths[backend]) for backend in args.backends}
+    observation_shape = (models["numpy"].observation_shape if "numpy" in models
+                         else models["sb3"].observation_space.shape)
+    observations = random_observations(observation_shape, args.predictions, args.seed)
+
+    print(f"{'backend':<8} {'startup s':>10} {'max RSS MB':>11} {'p50 us':>8} {'p99 us':>8}")
+    actions = {}
+    for backend, model in models.items():
+        startup_s, maxrss_mb = measure_startup(backend, paths[backend], args.startup_repeats)
+        p50_us, p99_us, actions[backend] = measure_latency(model, observations)
+        print(f"{backend:<8} {startup_s:>10.2f} {maxrss_mb:>11.1f} {p50_us:>8.1f} {p99_us:>8.1f}")
+    if len(actions) == 2:
+        print(f"max action difference {np.max(np.abs(actions['sb3'] - actions['numpy'])):.2e}")
+
+
+if __name__ == "__main__":
+    main()
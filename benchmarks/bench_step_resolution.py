@@ -0,0 +1,136 @@
+# bench_step_resolution.py
+"""
+Solve time of the optimizer engines across step durations and horizon lengths.
+
+Builds multi-day forecasts from the archived hourly prices in data/ (complete
+days, in date order) and resamples them to 60, 30 and 15 minute steps, then
+times the MILP with and without the LP-relaxation-first path on both solver
+backends, and the DP engine.
+
+Usage:
+    python benchmarks/bench_step_resolution.py [--days 1 2 3] [--repeats 5]
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+
+from linear_optimizer import prepare_problem, solve_problem, milp  # noqa: E402
+from dp_optimizer import run_dp_optimization  # noqa: E402
+
+BATTERY_PARAMS = {
+    'capacity_kwh': 7.4,
+    'max_charge_rate_kw': 1.2,
+    'max_discharge_rate_kw': 0.8,
+    'min_soc_percent': 10,
+    'efficiency_roundtrip': 0.90,
+}
+STEP_MINUTES = (60, 30, 15)
+INITIAL_SOCS = (10, 35, 60, 85)
+
+
+def load_daily_prices():
+    """Hourly price arrays of every complete day found in data/."""
+    days = {}
+    for path in sorted(glob.glob(os.path.join(REPO_ROOT, "data", "**", "electricity_prices*"),
+                              recursive=True)):
+        try:
+            with open(path) as f:
+                items = json.load(f)["data"]
+        except (ValueError, KeyError):
+            continue
+        for item in items:
+            days.setdefault(item["date"], {})[int(item["hour"])] = float(item["adjustedPrice"])
+    return [np.array([hours[h] for h in range(24)])
+            for _, hours in sorted(days.items()) if len(hours) == 24]
+
+
+def make_forecast(daily_prices, days, step_minutes, seed=0):
+    """
+    Forecast JSON with `days` days at `step_minutes` resolution.
+
+    Sub-hourly prices are interpolated between the hourly prices plus a
+    little noise, so quarter hours within an hour are not identical.
+    """
+    hourly = np.concatenate([daily_prices[d % len(daily_prices)] for d in range(days)])
+    steps_per_hour = 60 // step_minutes
+    t = np.arange(len(hourly) * steps_per_hour) / steps_per_hour
+    prices = np.interp(t, np.arange(len(hourly)), hourly)
+    if steps_per_hour > 1:
+        prices += np.random.default_rng(seed).normal(0.0, 0.005, len(prices))
+    data = [
+        {"index": i, "hour": int(t[i]) % 24, "date": f"day-{int(t[i]) // 24}",
+         "adjustedPrice": f"{price:.4f}"}
+        for i, price in enumerate(prices)
+    ]
+    return json.dumps({"data": data})
+
+
+def time_milp(forecast_json, params, backend, relax_first, repeats):
+    timings, methods, objectives = [], set(), []
+    # Untimed first solve builds the model template
+    problem, _ = prepare_problem(forecast_json, INITIAL_SOCS[0], 0, params)
+    solve_problem(problem, backend, relax_first)
+    for _ in range(repeats):
+        for soc in INITIAL_SOCS:
+            problem, _ = prepare_problem(forecast_json, soc, 0, params)
+            start = time.perf_counter()
+            result = solve_problem(problem, backend, relax_first)
+            timings.append(time.perf_counter() - start)
+            methods.add(result.method)
+            objectives.append(result.objective)
+    return timings, "/".join(sorted(methods)), objectives
+
+
+def time_dp(forecast_json, params, repeats):
+    timings, objectives = [], []
+    for _ in range(repeats):
+        for soc in INITIAL_SOCS:
+            start = time.perf_counter()
+            _, _, _, savings = run_dp_optimization(forecast_json, soc, 0, params)
+            timings.append(time.perf_counter() - start)
+            objectives.append(savings)
+    return timings, "dp", objectives
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    daily_prices = load_daily_prices()
+    print(f"{len(daily_prices)} complete days of archived prices")
+    backends = ["highs", "cbc"] if milp is not None else ["cbc"]
+
+    print(f"{'days':>4} {'step':>5} {'T':>4}  {'engine':<18} {'method':<8} "
+          f"{'p50 ms':>8} {'max ms':>8} {'objective':>10}")
+    for days in args.days:
+        for step_minutes in STEP_MINUTES:
+            forecast_json = make_forecast(daily_prices, days, step_minutes)
+            params = dict(BATTERY_PARAMS, step_hours=step_minutes / 60.0)
+            horizon = days * 24 * 60 // step_minutes
+            runs = [(f"milp-{backend}{'+lp' if relax else ''}",
+                     lambda b=backend, r=relax: time_milp(
+                         forecast_json, params, b, r, args.repeats))
+                    for backend in backends for relax in (False, True)]
+            runs.append(("dp", lambda: time_dp(forecast_json, params, args.repeats)))
+            for name, run in runs:
+                timings, method, objectives = run()
+                print(f"{days:>4} {step_minutes:>4}m {horizon:>4}  {name:<18} {method:<8} "
+                      f"{statistics.median(timings) * 1000:>8.1f} {max(timings) * 1000:>8.1f} "
+                      f"{statistics.mean(objectives):>10.4f}")
+
+
+if __name__ == "__main__":
+    main()
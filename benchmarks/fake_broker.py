@@ -0,0 +1,235 @@
+# fake_broker.py
+"""
+Minimal in-process MQTT 3.1.1 broker for load tests.
+
+Supports what the optimizer's clients use: CONNECT, SUBSCRIBE (exact topics
+and +/# wildcards), PUBLISH with QoS 0/1 and retained messages, PINGREQ and
+DISCONNECT. Messages are delivered to subscribers with QoS 0. No
+authentication, persistence or QoS 2. Counts connections and messages so
+connection churn is visible.
+
+Usage (standalone, e.g. for a server started separately):
+    python benchmarks/fake_broker.py [--port 1883] [--forecast data/electricity_prices.json]
+"""
+import argparse
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FORECAST_TOPIC = "iobroker/userdata/0/tibber-adjusted-prices"
+
+CONNECT, CONNACK, PUBLISH, PUBACK = 1, 2, 3, 4
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK = 8, 9, 10, 11
+PINGREQ, PINGRESP, DISCONNECT = 12, 13, 14
+
+
+def _encode_length(length):
+    encoded = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        encoded.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(encoded)
+
+
+def _packet(packet_type, flags, body):
+    return bytes([(packet_type << 4) | flags]) + _encode_length(len(body)) + body
+
+
+def _encode_string(value):
+    value = value.encode("utf-8") if isinstance(value, str) else value
+    return struct.pack("!H", len(value)) + value
+
+
+def _read_string(body, offset):
+    (length,) = struct.unpack_from("!H", body, offset)
+    return body[offset + 2:offset + 2 + length], offset + 2 + length
+
+
+def topic_matches(pattern, topic):
+    """MQTT topic filter matching with + and # wildcards."""
+    pattern_levels, topic_levels = pattern.split("/"), topic.split("/")
+    for i, level in enumerate(pattern_levels):
+        if level == "#":
+            return True
+        if i >= len(topic_levels) or (level != "+" and level != topic_levels[i]):
+            return False
+    return len(pattern_levels) == len(topic_levels)
+
+
+class _ClientHandler(socketserver.BaseRequestHandler):
+    def setup(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.send_lock = threading.Lock()
+        self.subscriptions = set()
+        self.server.broker._client_connected(self)
+
+    def finish(self):
+        self.server.broker._client_disconnected(self)
+
+    def send(self, data):
+        with self.send_lock:
+            self.request.sendall(data)
+
+    def _recv_exactly(self, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Connection closed")
+            data.extend(chunk)
+        return bytes(data)
+
+    def _read_packet(self):
+        header = self._recv_exactly(1)[0]
+        length, multiplier = 0, 1
+        while True:
+            byte = self._recv_exactly(1)[0]
+            length += (byte & 0x7F) * multiplier
+            multiplier *= 128
+            if not byte & 0x80:
+                break
+        return header >> 4, header & 0x0F, self._recv_exactly(length)
+
+    def handle(self):
+        broker = self.server.broker
+        try:
+            while True:
+                packet_type, flags, body = self._read_packet()
+                if packet_type == CONNECT:
+                    self.send(_packet(CONNACK, 0, b"\x00\x00"))
+                elif packet_type == PUBLISH:
+                    qos, retain = (flags >> 1) & 0x03, bool(flags & 0x01)
+                    topic, offset = _read_string(body, 0)
+                    if qos:
+                        packet_id = body[offset:offset + 2]
+                        offset += 2
+                        self.send(_packet(PUBACK, 0, packet_id))
+                    broker.publish(topic.decode("utf-8"), body[offset:], retain)
+                elif packet_type == SUBSCRIBE:
+                    packet_id, offset, granted, topics = body[:2], 2, bytearray(), []
+                    while offset < len(body):
+                        topic, offset = _read_string(body, offset)
+                        offset += 1  # Requested QoS, always granted as 0
+                        topics.append(topic.decode("utf-8"))
+                        granted.append(0)
+                    self.subscriptions.update(topics)
+                    self.send(_packet(SUBACK, 0, packet_id + bytes(granted)))
+                    broker._send_retained(self, topics)
+                elif packet_type == UNSUBSCRIBE:
+                    packet_id, offset = body[:2], 2
+                    while offset < len(body):
+                        topic, offset = _read_string(body, offset)
+                        self.subscriptions.discard(topic.decode("utf-8"))
+                    self.send(_packet(UNSUBACK, 0, packet_id))
+                elif packet_type == PINGREQ:
+                    self.send(_packet(PINGRESP, 0, b""))
+                elif packet_type == DISCONNECT:
+                    return
+        except (ConnectionError, OSError):
+            return
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeBroker:
+    """Threaded MQTT broker on `host:port` (port 0 picks a free port)."""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self._server = _Server((host, port), _ClientHandler)
+        self._server.broker = self
+        self.host, self.port = self._server.server_address
+        self._lock = threading.Lock()
+        self._clients = set()
+        self._retained = {}  # topic -> payload
+        self._thread = None
+        self.connections_total = 0
+        self.connections_max = 0
+        self.messages_received = 0
+        self.messages_by_topic = {}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def publish(self, topic, payload, retain=False):
+        """Delivers `payload` to all subscribers of `topic`, keeps it if `retain`."""
+        payload = payload.encode("utf-8") if isinstance(payload, str) else payload
+        with self._lock:
+            self.messages_received += 1
+            self.messages_by_topic[topic] = self.messages_by_topic.get(topic, 0) + 1
+            if retain:
+                self._retained[topic] = payload
+            clients = [client for client in self._clients
+                       if any(topic_matches(pattern, topic) for pattern in client.subscriptions)]
+        packet = _packet(PUBLISH, 0, _encode_string(topic) + payload)
+        for client in clients:
+            try:
+                client.send(packet)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "connections_total": self.connections_total,
+                "connections_open": len(self._clients),
+                "connections_max": self.connections_max,
+                "messages_received": self.messages_received,
+                "messages_by_topic": dict(self.messages_by_topic),
+            }
+
+    def _send_retained(self, client, patterns):
+        with self._lock:
+            retained = [(topic, payload) for topic, payload in self._retained.items()
+                        if any(topic_matches(pattern, topic) for pattern in patterns)]
+        for topic, payload in retained:
+            client.send(_packet(PUBLISH, 0x01, _encode_string(topic) + payload))
+
+    def _client_connected(self, client):
+        with self._lock:
+            self._clients.add(client)
+            self.connections_total += 1
+            self.connections_max = max(self.connections_max, len(self._clients))
+
+    def _client_disconnected(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--forecast", default=os.path.join(REPO_ROOT, "data", "electricity_prices.json"),
+                        help="Published retained on --forecast-topic")
+    parser.add_argument("--forecast-topic", default=DEFAULT_FORECAST_TOPIC)
+    args = parser.parse_args()
+
+    broker = FakeBroker(args.host, args.port).start()
+    with open(args.forecast, "rb") as f:
+        broker.publish(args.forecast_topic, f.read(), retain=True)
+    print(f"Fake MQTT broker on {broker.host}:{broker.port}, "
+          f"retained forecast on {args.forecast_topic}")
+    try:
+        while True:
+            time.sleep(10)
+            print(broker.stats())
+    except KeyboardInterrupt:
+        broker.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# load_test.py
+"""
+End-to-end load test of /optimize against a fake MQTT broker.
+
+Starts the in-process broker from fake_broker.py with the forecast from
+data/electricity_prices.json retained on the forecast topic, then (unless
+--url points at an already running server) imports the app configured for
+that broker and serves it with a threaded WSGI server. N simulated
+controllers each POST /optimize every --interval seconds (15 s by default,
+with random phase offsets) with their own SOC and the current time index.
+
+Reports throughput, latency percentiles, HTTP status/error counts, requests
+that were still running when the controller's next poll was due, and the
+broker's connection and message counts (new connections during the run show
+connection churn, the app itself should hold exactly two).
+
+Usage:
+    python benchmarks/load_test.py [--controllers 100] [--interval 15] [--duration 60]
+    python benchmarks/load_test.py --url http://localhost:5001 --broker-port 1883
+"""
+import argparse
+import collections
+import http.client
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+
+from fake_broker import DEFAULT_FORECAST_TOPIC, FakeBroker  # noqa: E402
+
+SCHEDULE_TOPIC = "battery/schedule/optimal"
+
+
+def start_app(broker, port):
+    """Imports the app configured for `broker` and serves it on `port`."""
+    os.environ.update({
+        "MQTT_BROKER": broker.host,
+        "MQTT_PORT": str(broker.port),
+        "MQTT_TOPIC_FORECAST": DEFAULT_FORECAST_TOPIC,
+        "MQTT_TOPIC": SCHEDULE_TOPIC,
+    })
+    os.environ.pop("MQTT_USERNAME", None)
+    from werkzeug.serving import make_server
+    import app as optimizer_app
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    optimizer_app.start_mqtt_clients()
+    server = make_server("127.0.0.1", port, optimizer_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    if not optimizer_app.forecast_subscriber.wait_for_forecast(10):
+        raise RuntimeError("App did not receive the retained forecast from the fake broker")
+    return server, optimizer_app
+
+
+class Controller(threading.Thread):
+    """Polls /optimize every `interval` seconds until `stop_at`."""
+
+    def __init__(self, url, interval, stop_at, time_indices, body_extra, results, rng):
+        super().__init__(daemon=True)
+        parsed = urllib.parse.urlsplit(url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self.interval = interval
+        self.stop_at = stop_at
+        self.time_indices = time_indices
+        self.body_extra = body_extra
+        self.results = results
+        self.rng = rng
+        self.soc = rng.uniform(10, 90)
+
+    def run(self):
+        next_poll = time.perf_counter() + self.rng.uniform(0, self.interval)
+        while next_poll < self.stop_at:
+            time.sleep(max(next_poll - time.perf_counter(), 0.0))
+            body = json.dumps({
+                "current_soc_percent": round(self.soc, 1),
+                "current_time_index": self.rng.choice(self.time_indices),
+                **self.body_extra,
+            })
+            start_time = time.perf_counter()
+            try:
+                # One connection per poll, like the controllers' HTTP clients
+                connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+                connection.request("POST", "/optimize", body,
+                                   {"Content-Type": "application/json"})
+                response = connection.getresponse()
+                response.read()
+                connection.close()
+                outcome = response.status
+            except (OSError, http.client.HTTPException) as e:
+                outcome = type(e).__name__
+            elapsed = time.perf_counter() - start_time
+            next_poll += self.interval
+            self.results.append((start_time, elapsed, outcome, time.perf_counter() > next_poll))
+            self.soc = min(max(self.soc + self.rng.uniform(-2, 2), 5), 95)
+
+
+def report(results, duration, broker_before, broker_after, controllers):
+    latencies = np.array([r[1] for r in results]) * 1000
+    outcomes = collections.Counter(r[2] for r in results)
+    errors = sum(count for outcome, count in outcomes.items() if outcome != 200)
+    summary = {
+        "controllers": controllers,
+        "requests": len(results),
+        "throughput_rps": len(results) / duration,
+        "latency_ms": {
+            name: float(np.percentile(latencies, q)) if len(latencies) else None
+            for name, q in (("p50", 50), ("p90", 90), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+        "outcomes": {str(outcome): count for outcome, count in outcomes.items()},
+        "error_rate": errors / len(results) if results else 0.0,
+        "overran_interval": sum(1 for r in results if r[3]),
+        "broker": {
+            "new_connections": broker_after["connections_total"] - broker_before["connections_total"],
+            "connections_open": broker_after["connections_open"],
+            "connections_max": broker_after["connections_max"],
+            "schedules_published": (broker_after["messages_by_topic"].get(SCHEDULE_TOPIC, 0)
+                                    - broker_before["messages_by_topic"].get(SCHEDULE_TOPIC, 0)),
+        },
+    }
+    latency = summary["latency_ms"]
+    print(f"{controllers} controllers, {len(results)} requests in {duration:.0f}s: "
+          f"{summary['throughput_rps']:.1f} req/s")
+    if len(latencies):
+        print("latency ms: " + ", ".join(f"{name} {value:.1f}" for name, value in latency.items()))
+    print(f"outcomes: {summary['outcomes']}, error rate {summary['error_rate'] * 100:.2f}%, "
+          f"{summary['overran_interval']} requests overran the poll interval")
+    print(f"broker: {summary['broker']}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--controllers", type=int, default=100)
+    parser.add_argument("--interval", type=float, default=15.0, help="Poll interval (s)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Test duration (s)")
+    parser.add_argument("--engine", help="Engine requested by the controllers "
+                        "(default: the server's, answered from the policy table "
+                        "if it runs with POLICY_TABLE_ENABLED=true)")
+    parser.add_argument("--battery-variants", type=int, default=1,
+                        help="Distinct battery_params sets among the controllers")
+    parser.add_argument("--url", help="Test a running server instead of an in-process app; "
+                        "its MQTT_BROKER/MQTT_PORT must point at --broker-port")
+    parser.add_argument("--port", type=int, default=5099, help="Port of the in-process app")
+    parser.add_argument("--broker-port", type=int, default=0)
+    parser.add_argument("--forecast", default=os.path.join(REPO_ROOT, "data", "electricity_prices.json"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the summary as JSON")
+    args = parser.parse_args()
+
+    broker = FakeBroker(port=args.broker_port).start()
+    with open(args.forecast, "rb") as f:
+        forecast_payload = f.read()
+    broker.publish(DEFAULT_FORECAST_TOPIC, forecast_payload, retain=True)
+    time_indices = sorted({int(item["index"]) for item in json.loads(forecast_payload)["data"]})
+    time_indices = time_indices[:max(len(time_indices) - 4, 1)]
+
+    server = optimizer_app = None
+    url = args.url
+    if url is None:
+        server, optimizer_app = start_app(broker, args.port)
+        url = f"http://127.0.0.1:{args.port}"
+    else:
+        print(f"Testing {url}, fake broker on {broker.host}:{broker.port}")
+        time.sleep(2)  # Give the server time to (re)connect and receive the forecast
+
+    rng = random.Random(args.seed)
+    results = []  # list.append is atomic, shared by all controllers
+    broker_before = broker.stats()
+    start_time = time.perf_counter()
+    stop_at = start_time + args.duration
+    controllers = []
+    for i in range(args.controllers):
+        body_extra = {}
+        if args.engine:
+            body_extra["engine"] = args.engine
+        if args.battery_variants > 1:
+            variant = i % args.battery_variants
+            body_extra["battery_params"] = {
+                'capacity_kwh': 5.0 + variant, 'max_charge_rate_kw': 1.2,
+                'max_discharge_rate_kw': 0.8, 'min_soc_percent': 10,
+                'efficiency_roundtrip': 0.90}
+        controllers.append(Controller(url, args.interval, stop_at, time_indices, body_extra,
+                                      results, random.Random(rng.random())))
+    for controller in controllers:
+        controller.start()
+    for controller in controllers:
+        controller.join()
+    duration = time.perf_counter() - start_time
+
+    summary = report(results, duration, broker_before, broker.stats(), args.controllers)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    if server is not None:
+        server.shutdown()
+        optimizer_app.batch_optimizer.shutdown()
+        optimizer_app.schedule_publisher.stop()
+        optimizer_app.forecast_subscriber.stop()
+    broker.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# run_benchmarks.py
+"""
+Reproducible latency/memory/objective benchmark of run_optimization.
+
+Cases are every archived price file under data/ (including data/fetched_data/)
+and synthetic forecasts of 24, 48, 96 and 288 steps built from those prices
+(see bench_step_resolution.py), each solved for a grid of battery parameter
+sets, start SOCs and solver backends. Per case it reports the latency and
+model-build time of a cold first call (model template cache cleared), then
+p50/p95/p99 latency of warm calls, the model-build and solve parts of them
+(from the optimizer_phase_seconds metrics), the tracemalloc peak of one extra
+call and the savings, and writes everything as JSON.
+
+Compare two runs (e.g. before and after a commit) with --compare; cases whose
+p50 got slower by more than --threshold, or whose savings changed, are listed.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--repeats 20] [--output results.json]
+    python benchmarks/run_benchmarks.py --compare baseline.json [--threshold 0.2]
+"""
+import argparse
+import datetime
+import glob
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+
+from forecast import Forecast  # noqa: E402
+from linear_optimizer import (  # noqa: E402
+    SOLVER_BACKENDS, clear_template_cache, milp, run_optimization)
+from metrics import PHASE_SECONDS  # noqa: E402
+from bench_step_resolution import load_daily_prices, make_forecast  # noqa: E402
+
+# Synthetic horizons as (steps, days, step minutes)
+SYNTHETIC_HORIZONS = ((24, 1, 60), (48, 2, 60), (96, 1, 15), (288, 3, 15))
+BATTERY_GRID = {
+    "small": {'capacity_kwh': 5.0, 'max_charge_rate_kw': 1.0, 'max_discharge_rate_kw': 0.6,
+              'min_soc_percent': 10, 'efficiency_roundtrip': 0.90},
+    "default": {'capacity_kwh': 7.4, 'max_charge_rate_kw': 1.2, 'max_discharge_rate_kw': 0.8,
+                'min_soc_percent': 10, 'efficiency_roundtrip': 0.90},
+    "large": {'capacity_kwh': 13.5, 'max_charge_rate_kw': 5.0, 'max_discharge_rate_kw': 5.0,
+              'min_soc_percent': 5, 'efficiency_roundtrip': 0.92},
+}
+INITIAL_SOCS = (20, 60)
+PHASES = ("prepare", "model_build", "solve", "results")
+
+
+def forecast_cases():
+    """(name, Forecast, step_hours) of every archived file and synthetic horizon."""
+    cases = []
+    paths = sorted(glob.glob(os.path.join(REPO_ROOT, "data", "**", "electricity_prices*"),
+                             recursive=True))
+    for path in paths:
+        with open(path, "rb") as f:
+            forecast, error = Forecast.parse(f.read())
+        if error:
+            logging.warning(f"Skipping {path}: {error}")
+            continue
+        cases.append((os.path.relpath(path, REPO_ROOT), forecast, 1.0))
+    daily_prices = load_daily_prices()
+    for steps, days, step_minutes in SYNTHETIC_HORIZONS:
+        forecast, _ = Forecast.parse(make_forecast(daily_prices, days, step_minutes))
+        cases.append((f"synthetic-{steps}", forecast, step_minutes / 60.0))
+    return cases
+
+
+def phase_totals():
+    return {key[0]: value for key, value in PHASE_SECONDS.totals().items()}
+
+
+def phase_deltas(before, after, calls):
+    """Mean milliseconds per call of each phase between two phase_totals()."""
+    phases_ms = {}
+    for phase in PHASES:
+        total, count = after.get(phase, (0.0, 0))
+        previous_total, previous_count = before.get(phase, (0.0, 0))
+        if count > previous_count:
+            phases_ms[phase] = (total - previous_total) / calls * 1000
+    return phases_ms
+
+
+def percentile_ms(timings, q):
+    return float(np.percentile(timings, q)) * 1000
+
+
+def run_case(forecast, params, soc, backend, repeats):
+    """Latency percentiles, phase split, peak memory and savings of one case."""
+    def call():
+        return run_optimization(forecast, soc, int(forecast.indices[0]), params,
+                                solver_backend=backend)
+
+    # Cold first call: builds the model template the warm calls reuse
+    clear_template_cache()
+    before = phase_totals()
+    start_time = time.perf_counter()
+    status, _, _, savings = call()
+    cold_ms = (time.perf_counter() - start_time) * 1000
+    cold_phases_ms = phase_deltas(before, phase_totals(), 1)
+
+    timings = []
+    before = phase_totals()
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start_time)
+    after = phase_totals()
+
+    tracemalloc.start()
+    call()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "status": status,
+        "savings": savings,
+        "cold_ms": cold_ms,
+        "cold_phase_ms": cold_phases_ms,
+        "p50_ms": percentile_ms(timings, 50),
+        "p95_ms": percentile_ms(timings, 95),
+        "p99_ms": percentile_ms(timings, 99),
+        "mean_phase_ms": phase_deltas(before, after, repeats),
+        "peak_memory_kib": peak_bytes / 1024,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    backends = args.backends or [b for b in SOLVER_BACKENDS if b != "highs" or milp is not None]
+    cases = []
+    print(f"{'forecast':<56} {'T':>4} {'battery':<8} {'soc':>3} {'backend':<7} "
+          f"{'cold ms':>7} {'c.build':>7} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'build':>6} {'solve':>6} "
+          f"{'KiB':>6} {'savings':>8}")
+    for (name, forecast, step_hours), (battery, params), soc, backend in itertools.product(
+            forecast_cases(), BATTERY_GRID.items(), INITIAL_SOCS, backends):
+        result = run_case(forecast, dict(params, step_hours=step_hours), soc, backend,
+                          args.repeats)
+        case = {"forecast": name, "horizon": len(forecast), "battery": battery,
+                "initial_soc_percent": soc, "backend": backend, **result}
+        cases.append(case)
+        phases = result["mean_phase_ms"]
+        cold_build_ms = result["cold_phase_ms"].get("model_build", 0.0)
+        print(f"{name:<56} {len(forecast):>4} {battery:<8} {soc:>3} {backend:<7} "
+              f"{result['cold_ms']:>7.2f} {cold_build_ms:>7.2f} {result['p50_ms']:>7.2f} {result['p95_ms']:>7.2f} {result['p99_ms']:>7.2f} "
+              f"{phases.get('model_build', 0.0):>6.2f} {phases.get('solve', 0.0):>6.2f} "
+              f"{result['peak_memory_kib']:>6.0f} {result['savings'] or 0.0:>8.4f}")
+
+    report = {
+        "revision": git_revision(),
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeats": args.repeats,
+        "cases": cases,
+    }
+    output = args.output or os.path.join(
+        REPO_ROOT, "benchmarks", "results", f"{report['revision'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    return report
+
+
+def case_key(case):
+    return (case["forecast"], case["battery"], case["initial_soc_percent"], case["backend"])
+
+
+def compare(baseline_path, report, threshold):
+    """Prints cases that got slower than `threshold` or whose savings changed."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    baseline_cases = {case_key(case): case for case in baseline["cases"]}
+    regressions = 0
+    for case in report["cases"]:
+        old = baseline_cases.get(case_key(case))
+        if old is None:
+            continue
+        ratio = case["p50_ms"] / old["p50_ms"] if old["p50_ms"] else 1.0
+        savings_changed = abs((case["savings"] or 0.0) - (old["savings"] or 0.0)) > 1e-6
+        if ratio > 1 + threshold or savings_changed:
+            regressions += 1
+            print(f"{' / '.join(map(str, case_key(case)))}: p50 {old['p50_ms']:.2f} -> "
+                  f"{case['p50_ms']:.2f} ms ({ratio:.2f}x), savings {old['savings']} -> "
+                  f"{case['savings']}")
+    print(f"{regressions} of {len(report['cases'])} cases regressed against "
+          f"{baseline.get('revision') or baseline_path}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--backends", nargs="+", choices=sorted(SOLVER_BACKENDS))
+    parser.add_argument("--output", help="JSON results file "
+                        "(default benchmarks/results/<git revision>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative p50 slowdown reported as a regression")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    report = run(args)
+    if args.compare:
+        sys.exit(1 if compare(args.compare, report, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import json
+
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.env_util import make_vec_env
+from stable_baselines3.common.vec_env import SubprocVecEnv, VecEnv, VecMonitor
+
+from battery_env import BatteryEnv
+
+
+class BatchedBatteryEnv(VecEnv):
+    """
+    The BatteryEnv dynamics for `num_envs` episodes at once, as a native
+    stable-baselines3 VecEnv.
+
+    SOC update, clipping, reward and constraint penalty are computed for all
+    episodes with NumPy array operations instead of stepping one Python env
+    per episode. Like DummyVecEnv, finished episodes are reset automatically
+    and their last observation is returned in `infos[i]["terminal_observation"]`.
+
+    Like BatteryEnv, observations are written into two buffers used in turn:
+    the returned array stays valid until the step after next, so the
+    observation an algorithm keeps while stepping (SB3's `_last_obs`) is not
+    overwritten by the step that follows it.
+    """
+
+    # Same constants as BatteryEnv.step
+    CYCLE_PENALTY = 0.01
+    CONSTRAINT_PENALTY = 10
+    # An episode ends this many steps before the end of the price data
+    END_MARGIN = 13
+
+    def __init__(
+        self,
+        price_data_path,
+        num_envs,
+        inference_mode=False,
+        start_soc=0,
+        start_step=0,
+        max_change_rate=0.5,
+        seed=None,
+    ):
+        with open(price_data_path, "r") as f:
+            price_data = json.load(f)["data"]
+        self.max_data_points = 48
+        self.inference_mode = inference_mode
+        self.start_soc = start_soc
+        self.start_step = start_step
+
+        prices = np.array([float(item["adjustedPrice"]) for item in price_data], dtype=np.float32)
+        self.min_price = float(prices.min())
+        self.max_price = float(prices.max())
+        self.normalized_prices = (prices - self.min_price) / (self.max_price - self.min_price)
+        self.num_prices = len(prices)
+
+        n = self.max_data_points
+        observation_space = spaces.Box(
+            low=np.zeros(3 + 2 * n, dtype=np.float32),
+            high=np.array([1.0, 1.0, n] + [1.0] * (2 * n), dtype=np.float32),
+            dtype=np.float32,
+        )
+        action_space = spaces.Box(low=-1.0, high=1.0, shape=(1,), dtype=np.float32)
+        super().__init__(num_envs, observation_space, action_space)
+
+        # Per-episode state
+        self.soc = np.zeros(num_envs)
+        self.max_change_rate = np.full(num_envs, float(max_change_rate))
+        self.current_step = np.zeros(num_envs, dtype=np.int64)
+        self.balance = np.zeros(num_envs)
+        self._rng = np.random.default_rng(seed)
+        self._actions = np.zeros(num_envs)
+
+        visible = min(self.num_prices, n)
+        self._observations = np.empty((2, num_envs, 3 + 2 * n), dtype=np.float32)
+        self._next_buffer = 0
+        self._observations[:, :, 3:3 + n] = 0.5  # No price for this slot
+        self._observations[:, :, 3:3 + visible] = self.normalized_prices[:visible]
+        self._observations[:, :, 3 + n:] = 0.0  # has_value mask
+        self._observations[:, :, 3 + n:3 + n + visible] = 1.0
+
+    def _reset_episodes(self, mask):
+        """Starts new episodes for the envs selected by boolean `mask`."""
+        count = int(np.count_nonzero(mask))
+        if not count:
+            return
+        self.current_step[mask] = self.start_step
+        self.balance[mask] = 0.0
+        if self.inference_mode:
+            self.soc[mask] = self.start_soc
+        else:
+            self.soc[mask] = 0.0
+            self.max_change_rate[mask] = self._rng.uniform(0.1, 0.5, count)
+
+    def _get_observations(self):
+        observations = self._observations[self._next_buffer]
+        self._next_buffer ^= 1
+        return self._write_observations(observations)
+
+    def _write_observations(self, observations):
+        observations[:, 0] = self.soc
+        observations[:, 1] = self.max_change_rate
+        observations[:, 2] = self.current_step
+        return observations
+
+    def reset(self):
+        self._reset_episodes(np.ones(self.num_envs, dtype=bool))
+        return self._get_observations()
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions, dtype=np.float64).reshape(self.num_envs)
+
+    def step_wait(self):
+        actions = self._actions
+        dones = self.current_step >= self.num_prices - self.END_MARGIN
+
+        change_rate = actions * self.max_change_rate
+        # change_rate / max_change_rate, as BatteryEnv computes it
+        change_rate_normalized = actions
+        current_price = self.normalized_prices[self.current_step].astype(np.float64)
+
+        charge_cost = -np.maximum(change_rate_normalized, 0.0) * current_price
+        discharge_profit = -np.minimum(change_rate_normalized, 0.0) * current_price
+        battery_wear = self.CYCLE_PENALTY * np.abs(change_rate_normalized)
+
+        self.soc += change_rate
+        constraint_violation = np.where(
+            (self.soc > 1.0) | (self.soc < 0.0), float(self.CONSTRAINT_PENALTY), 0.0)
+        rewards = charge_cost + discharge_profit - battery_wear - constraint_violation
+        self.balance += rewards
+        np.clip(self.soc, 0.0, 1.0, out=self.soc)
+        self.current_step += 1
+
+        infos = [{"balance": balance} for balance in self.balance.tolist()]
+        observations = self._get_observations()
+        if dones.any():
+            terminal_observations = observations[dones]  # A copy
+            for i, observation in zip(np.flatnonzero(dones).tolist(), terminal_observations):
+                infos[i]["terminal_observation"] = observation
+            self._reset_episodes(dones)
+            self._write_observations(observations)
+        return observations, rewards.astype(np.float32), dones, infos
+
+    def close(self):
+        pass
+
+    def seed(self, seed=None):
+        self._rng = np.random.default_rng(seed)
+        return [None if seed is None else seed + i for i in range(self.num_envs)]
+
+    def get_attr(self, attr_name, indices=None):
+        value = getattr(self, attr_name)
+        indices = self._get_indices(indices)
+        if isinstance(value, np.ndarray) and value.shape[:1] == (self.num_envs,):
+            return [value[i] for i in indices]
+        return [value for _ in indices]
+
+    def set_attr(self, attr_name, value, indices=None):
+        current = getattr(self, attr_name)
+        if isinstance(current, np.ndarray) and current.shape[:1] == (self.num_envs,):
+            current[list(self._get_indices(indices))] = value
+        else:
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        raise NotImplementedError("BatchedBatteryEnv has no per-episode env objects")
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
+
+
+def make_battery_vec_env(price_data_path, n_envs=1):
+    """
+    Training env for `n_envs` parallel episodes: the plain BatteryEnv for one,
+    BatchedBatteryEnv (with episode statistics) for more.
+    """
+    if n_envs == 1:
+        return make_vec_env(lambda: BatteryEnv(price_data_path), n_envs=1)
+    return VecMonitor(BatchedBatteryEnv(price_data_path, n_envs))
+
+
+def make_mixture_vec_env(dataset_path, n_workers, seed=0):
+    """
+    Training env with one worker process per episode stream. Every worker
+    draws each episode's day and start step at random from the memory-mapped
+    price dataset (see price_dataset.py), which all workers share read-only,
+    so rollouts mix all days and env steps run on `n_workers` cores.
+    """
+    # 'spawn' rather than fork: the workers start clean instead of copying
+    # the trainer process (torch's thread pools do not survive a fork)
+    env = SubprocVecEnv(
+        [lambda: BatteryEnv(dataset=dataset_path) for _ in range(n_workers)],
+        start_method="spawn")
+    env.seed(seed)  # Worker i is seeded with seed + i on the first reset
+    return VecMonitor(env)
+
+
+def ppo_rollout_kwargs(n_envs, rollout_size=2048, max_minibatches=32):
+    """
+    PPO `n_steps`/`batch_size` for `n_envs` parallel episodes. One env gets
+    the SB3 defaults (2048 steps, batches of 64); with many envs each collects
+    fewer steps and the rollout is split into at most `max_minibatches`.
+    """
+    n_steps = max(rollout_size // n_envs, 16)
+    total = n_steps * n_envs
+    minibatches = min(max_minibatches, max(total // 64, 1))
+    return {"n_steps": n_steps, "batch_size": total // minibatches}
@@ -1,24 +1,32 @@
+import json
+
 import gymnasium as gym
 import numpy as np
-import pandas as pd
 from gymnasium import spaces
 
+from price_dataset import PriceDataset
+
 
 class BatteryEnv(gym.Env):
-    """Custom Gym environment for battery charging optimization using real electricity price data."""
+    """
+    Custom Gym environment for battery charging optimization using real electricity price data.
+
+    Prices come from one price file, or with `dataset` (a PriceDataset or
+    the path of one) every training episode starts on a random archived
+    series at a random step.
+    """
 
     def __init__(
         self,
-        price_data_path,
+        price_data_path=None,
         inference_mode=False,
         start_soc=0,
         start_step=0,
         max_change_rate=0.5,
+        dataset=None,
     ):
         super(BatteryEnv, self).__init__()
 
-        self.price_data = pd.read_json(price_data_path)[
-            "data"]  # Load JSON price data
         self.max_data_points = 48
         self.max_change_rate = max_change_rate
         self.current_step = 0
@@ -26,20 +34,24 @@ class BatteryEnv(gym.Env):
         self.start_soc = start_soc
         self.start_step = start_step
 
-        # Calculate mean price for the complete data
-        self.min_price = np.min(
-            [
-                float(self.price_data[i]["adjustedPrice"])
-                for i in range(0, len(self.price_data))
-            ]
-        )
-
-        self.max_price = np.max(
-            [
-                float(self.price_data[i]["adjustedPrice"])
-                for i in range(0, len(self.price_data))
-            ]
-        )
+        # Two observation buffers used in turn, so the previous observation
+        # (e.g. the terminal one a VecEnv keeps across reset) stays intact
+        self._observations = np.empty(
+            (2, 3 + 2 * self.max_data_points), dtype=np.float32)
+        self._next_buffer = 0
+        # normalized_prices each buffer's price part was written for
+        self._buffer_prices = [None, None]
+
+        if isinstance(dataset, str):
+            dataset = PriceDataset.open(dataset)
+        self.dataset = dataset
+        if dataset is not None:
+            self._set_prices(dataset.series(0))
+        else:
+            with open(price_data_path, "r") as f:
+                price_data = json.load(f)["data"]  # Load JSON price data
+            self._set_prices(np.array(
+                [float(item["adjustedPrice"]) for item in price_data], dtype=np.float32))
 
         self.observation_space = spaces.Box(
             low=np.array(
@@ -64,14 +76,45 @@ class BatteryEnv(gym.Env):
         self.action_space = spaces.Box(
             low=-1.0, high=1.0, shape=(1,), dtype=np.float32)
 
+    def _set_prices(self, prices):
+        """
+        Normalizes `prices` once per series. The static price part of an
+        observation buffer is rewritten only when the buffer is next used
+        (see _get_observation), so a new series does not change the previous
+        observation; per step only the SOC, max change rate and step index
+        of the observation change.
+        """
+        self.prices = prices
+        self.min_price = float(prices.min())
+        self.max_price = float(prices.max())
+        self.normalized_prices = self.normalize_price(prices).astype(np.float32)
+        self.num_prices = len(prices)
+
+    def _write_prices(self, observation):
+        n = self.max_data_points
+        visible = min(self.num_prices, n)
+        observation[3:3 + n] = 0.5  # No price for this slot
+        observation[3:3 + visible] = self.normalized_prices[:visible]
+        observation[3 + n:] = 0.0  # has_value mask
+        observation[3 + n:3 + n + visible] = 1.0
+
     def reset(self, seed=None, options=None):
         """Reset the environment at the beginning of an episode."""
-        if not self.inference_mode:
+        super().reset(seed=seed)  # Seeds self.np_random
+
+        if not self.inference_mode and self.dataset is not None:
+            # Random series and start step, read from the mapped dataset
+            self._set_prices(self.dataset.series(self.np_random.integers(len(self.dataset))))
+            self.current_step = int(self.np_random.integers(0, max(self.num_prices - 13, 1)))
+            self.soc = 0
+            self.max_change_rate = self.np_random.uniform(0.1, 0.5)
+
+        elif not self.inference_mode:
             # self.current_step = np.random.randint(0, len(self.price_data) - 1)
             self.current_step = self.start_step
             # self.soc = np.random.uniform(0.2, 0.8)  # Random initial SoC
             self.soc = 0
-            self.max_change_rate = np.random.uniform(0.1, 0.5)
+            self.max_change_rate = self.np_random.uniform(0.1, 0.5)
 
         else:
             self.current_step = self.start_step
@@ -82,30 +125,23 @@ class BatteryEnv(gym.Env):
         return self._get_observation(), {}
 
     def _get_observation(self):
-        """Return the current observation state."""
-        all_prices = [
-            (
-                self.normalize_price(
-                    float(self.price_data[i]["adjustedPrice"]))
-                if i < len(self.price_data)
-                else 0.5
-            )
-            for i in range(self.max_data_points)
-        ]
-        has_value = [
-            1.0 if i < len(self.price_data) else 0.0
-            for i in range(self.max_data_points)
-        ]
-
-        return np.concatenate(
-            (
-                [self.soc],
-                [self.max_change_rate],
-                [self.current_step],
-                np.array(all_prices, dtype=np.float32),
-                np.array(has_value, dtype=np.float32),
-            )
-        )
+        """
+        Return the current observation state.
+
+        The returned array is a buffer owned by the env that is overwritten
+        two steps later; copy it to keep it longer.
+        """
+        buffer = self._next_buffer
+        observation = self._observations[buffer]
+        self._next_buffer ^= 1
+        if self._buffer_prices[buffer] is not self.normalized_prices:
+            self._write_prices(observation)
+            self._buffer_prices[buffer] = self.normalized_prices
+        observation[0] = self.soc
+        observation[1] = self.max_change_rate
+        observation[2] = self.current_step
+        return observation
+
     # Normalize the price
 
     def normalize_price(self, price):
@@ -115,13 +151,12 @@ class BatteryEnv(gym.Env):
         """Apply the agent's action and calculate the reward."""
 
         # Ensure the episode lasts exactly 48 steps
-        done = self.current_step >= len(self.price_data) - 13
+        done = self.current_step >= self.num_prices - 13
 
-        change_rate = action[0] * self.max_change_rate
+        change_rate = float(action[0]) * self.max_change_rate
         change_rate_normalized = change_rate / self.max_change_rate
 
-        current_price = self.normalize_price(float(
-            self.price_data[self.current_step]["adjustedPrice"]))
+        current_price = float(self.normalized_prices[self.current_step])
 
         # Define penalty weights
         cycle_penalty = 0.01  # Small penalty for unnecessary cycling
@@ -147,7 +182,7 @@ class BatteryEnv(gym.Env):
 
         self.balance += reward
 
-        self.soc = np.clip(self.soc, 0, 1)
+        self.soc = min(max(self.soc, 0.0), 1.0)
 
         # if self.inference_mode:
         #     # Debug prints
@@ -0,0 +1,65 @@
+import os
+import sys
+
+import numpy as np
+from stable_baselines3 import PPO
+from stable_baselines3.common.torch_layers import FlattenExtractor
+from torch import nn
+
+from numpy_policy import ACTIVATIONS
+
+DATA_PATH = os.getenv("DATA_PATH")
+MODEL_PATH = f"{DATA_PATH}/models/battery_rl_model_v0_3"
+
+
+def export_policy(model, output_path):
+    """
+    Writes the deterministic actor of a PPO MlpPolicy to `output_path` (.npz)
+    for NumpyPolicy (numpy_policy.py).
+
+    Only the parts `predict(obs, deterministic=True)` uses are exported: the
+    policy branch of the MLP extractor and the action head. The value
+    network, log std and optimizer state are left out.
+
+    Args:
+        model: Trained PPO model with a Box action space.
+        output_path: Path of the .npz file.
+    """
+    policy = model.policy
+    if not isinstance(policy.pi_features_extractor, FlattenExtractor):
+        raise ValueError(f"Unsupported features extractor {type(policy.pi_features_extractor).__name__}")
+    if policy.squash_output:
+        raise ValueError("Policies with squashed output are not supported")
+
+    arrays = {}
+    activations = []
+    layers = [module for module in policy.mlp_extractor.policy_net] + [policy.action_net]
+    num_layers = 0
+    for module in layers:
+        if isinstance(module, nn.Linear):
+            if len(activations) < num_layers:
+                activations.append("Identity")  # Two Linear layers in a row
+            arrays[f"W{num_layers}"] = module.weight.detach().cpu().numpy().T.astype(np.float32)
+            arrays[f"b{num_layers}"] = module.bias.detach().cpu().numpy().astype(np.float32)
+            num_layers += 1
+        elif len(activations) < num_layers and type(module).__name__ in ACTIVATIONS:
+            activations.append(type(module).__name__)
+        else:
+            raise ValueError(f"Unsupported layer {module}")
+
+    np.savez(
+        output_path,
+        num_layers=num_layers,
+        activations=np.array(activations),
+        action_low=model.action_space.low.astype(np.float32),
+        action_high=model.action_space.high.astype(np.float32),
+        observation_shape=np.array(model.observation_space.shape),
+        **arrays,
+    )
+    print(f"Exported {num_layers} layers ({', '.join(activations)}) to {output_path}")
+
+
+if __name__ == "__main__":
+    model_path = sys.argv[1] if len(sys.argv) > 1 else MODEL_PATH
+    output_path = sys.argv[2] if len(sys.argv) > 2 else f"{model_path}.npz"
+    export_policy(PPO.load(model_path), output_path)
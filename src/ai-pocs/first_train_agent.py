@@ -2,33 +2,40 @@ import gymnasium as gym
 import numpy as np
 import matplotlib.pyplot as plt
 from stable_baselines3 import PPO
-from stable_baselines3.common.env_util import make_vec_env
-from battery_env import BatteryEnv
+from batched_battery_env import make_battery_vec_env, make_mixture_vec_env, ppo_rollout_kwargs
+from export_policy import export_policy
 from datetime import datetime
 import os
 import glob
+from price_dataset import PRICE_DATASET_PATH, PRICE_FILE_PATTERNS, PriceDataset
 
 # Define training parameters
 TRAINING_STEPS = 300_000
+# Parallel episodes per training env (> 1 uses the batched NumPy env)
+N_ENVS = int(os.getenv("N_ENVS", 1))
+# "sequential": fine-tune on one file after the other; "mixture": one model on
+# episodes drawn from all archived days, stepped by N_WORKERS processes
+TRAINING_MODE = os.getenv("TRAINING_MODE", "sequential")
+N_WORKERS = int(os.getenv("N_WORKERS", os.cpu_count() or 1))
 
 DATA_PATH = os.getenv("DATA_PATH")
 MODEL_PATH = f"{DATA_PATH}/models/battery_rl_model"
 PRICE_DATA_PATH_PATTERN = f"{DATA_PATH}/fetched_data/electricity_prices.json"
 
 
-def train():
+def train(n_envs=N_ENVS):
     # Get all JSON files in the fetched_data folder
     price_data_files = glob.glob(PRICE_DATA_PATH_PATTERN)
 
     # Initialize a new model
-    env = make_vec_env(lambda: BatteryEnv(price_data_files[0]), n_envs=1)
-    model = PPO("MlpPolicy", env, verbose=1)
+    env = make_battery_vec_env(price_data_files[0], n_envs)
+    model = PPO("MlpPolicy", env, verbose=1, **ppo_rollout_kwargs(n_envs))
     print("Initialized a new model")
 
     # Train the model on each file sequentially
     for file in price_data_files:
         print(f"Training on file: {file}")
-        env = make_vec_env(lambda: BatteryEnv(file), n_envs=1)
+        env = make_battery_vec_env(file, n_envs)
         model.set_env(env)
         model.learn(total_timesteps=TRAINING_STEPS)
         env.close()
@@ -38,7 +45,32 @@ def train():
     filename = f"{MODEL_PATH}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
     model.save(filename)
     print(f"Model saved to {filename}")
+    export_policy(model, f"{filename}.npz")
+
+
+def train_mixture(n_workers=N_WORKERS):
+    # Compile all current and archived price files into the mapped dataset
+    price_data_files = [path for pattern in PRICE_FILE_PATTERNS
+                        for path in glob.glob(pattern)]
+    dataset = PriceDataset.build(price_data_files, PRICE_DATASET_PATH)
+    print(f"Training on a mixture of {len(dataset)} price series "
+          f"with {n_workers} worker processes")
+
+    env = make_mixture_vec_env(PRICE_DATASET_PATH, n_workers)
+    model = PPO("MlpPolicy", env, verbose=1, **ppo_rollout_kwargs(n_workers))
+    # Sequential mode spends TRAINING_STEPS per file it matches; spend the
+    # same per file the mixture was compiled from
+    model.learn(total_timesteps=TRAINING_STEPS * len(price_data_files))
+    env.close()
+
+    filename = f"{MODEL_PATH}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    model.save(filename)
+    print(f"Model saved to {filename}")
+    export_policy(model, f"{filename}.npz")
 
 
 if __name__ == "__main__":
-    train()
+    if TRAINING_MODE == "mixture":
+        train_mixture()
+    else:
+        train()
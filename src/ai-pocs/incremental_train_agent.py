@@ -2,42 +2,45 @@ import gymnasium as gym
 import numpy as np
 import matplotlib.pyplot as plt
 from stable_baselines3 import PPO
-from stable_baselines3.common.env_util import make_vec_env
-from battery_env import BatteryEnv
+from batched_battery_env import make_battery_vec_env, ppo_rollout_kwargs
+from export_policy import export_policy
 import os
 
 # Define training parameters
 TRAINING_STEPS = 100_000
+# Parallel episodes per training env (> 1 uses the batched NumPy env)
+N_ENVS = int(os.getenv("N_ENVS", 1))
 
 DATA_PATH = os.getenv("DATA_PATH")
 MODEL_PATH = f"{DATA_PATH}/models/battery_rl_model_v0_3"
 PRICE_DATA_PATH = f"{DATA_PATH}/electricity_prices.json"
 
 
-def train():
+def train(n_envs=N_ENVS):
+    # Environment with the new data
+    env = make_battery_vec_env(PRICE_DATA_PATH, n_envs)
+
     # Check if the model already exists
     if os.path.exists(MODEL_PATH):
-        # Load the existing model
-        model = PPO.load(MODEL_PATH)
+        # Load the existing model; passing the env rebuilds its rollout
+        # buffer in case it was trained with a different n_envs
+        model = PPO.load(MODEL_PATH, env=env)
         print(f"Loaded existing model from {MODEL_PATH}")
     else:
         # Initialize a new model
-        env = make_vec_env(lambda: BatteryEnv(PRICE_DATA_PATH), n_envs=1)
-        model = PPO("MlpPolicy", env, verbose=1)
+        model = PPO("MlpPolicy", env, verbose=1, **ppo_rollout_kwargs(n_envs))
         print("Initialized a new model")
 
-    # Update the environment with new data
-    env = make_vec_env(lambda: BatteryEnv(PRICE_DATA_PATH), n_envs=1)
-
     # Continue training the model
     print("Starting training...")
-    model.set_env(env)
     model.learn(total_timesteps=TRAINING_STEPS)
     print("Training completed!")
 
     # Save the refined model
     model.save(MODEL_PATH)
     print(f"Model saved to {MODEL_PATH}")
+    # Policy weights for the torch-free inference backend
+    export_policy(model, f"{MODEL_PATH}.npz")
 
     # Close the environment
     env.close()
@@ -3,8 +3,8 @@ import json
 import glob
 import paho.mqtt.client as mqtt
 from flask import Flask, request, jsonify
-from stable_baselines3 import PPO
 from battery_env import BatteryEnv  # Import custom environment
+from numpy_policy import NumpyPolicy
 from datetime import datetime
 
 app = Flask(__name__)
@@ -14,7 +14,20 @@ DATA_PATH = os.getenv("DATA_PATH")
 
 MODEL_PATH = f"{DATA_PATH}/models/battery_rl_model_v0_3"
 PRICE_DATA_PATH = f"{DATA_PATH}/electricity_prices.json"
-model = PPO.load(MODEL_PATH)
+# "sb3" loads the full PPO model (needs torch), "numpy" the policy exported
+# by export_policy.py to MODEL_PATH.npz
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "sb3")
+
+
+def load_model():
+    if INFERENCE_BACKEND == "numpy":
+        return NumpyPolicy.load(f"{MODEL_PATH}.npz")
+    from stable_baselines3 import PPO  # Imports torch
+
+    return PPO.load(MODEL_PATH)
+
+
+model = load_model()
 
 # Define MQTT server details
 MQTT_BROKER = os.getenv("MQTT_BROKER")
@@ -27,7 +40,7 @@ MQTT_PASSWORD = os.getenv("MQTT_PASSWORD")
 @app.route("/reload_model", methods=["POST"])
 def reload_model():
     global model
-    model = PPO.load(MODEL_PATH)
+    model = load_model()
     return jsonify({"message": "Model reloaded successfully"})
 
 
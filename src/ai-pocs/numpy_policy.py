@@ -0,0 +1,60 @@
+import numpy as np
+
+ACTIVATIONS = {
+    "Tanh": np.tanh,
+    "ReLU": lambda x: np.maximum(x, 0.0),
+    "Identity": lambda x: x,
+}
+
+
+class NumpyPolicy:
+    """
+    Deterministic PPO actor evaluated with NumPy, without torch.
+
+    Loads the .npz written by export_policy.py: the Linear layers of the
+    policy MLP (weights stored as (in, out) so a forward pass is one matrix
+    multiply per layer), their activation names, the action head and the
+    action space bounds. `predict()` returns the mean action clipped to the
+    action space, which is what `PPO.predict(obs, deterministic=True)`
+    returns for a Box action space.
+    """
+
+    def __init__(self, weights, biases, activations, action_low, action_high, observation_shape):
+        self.weights = weights
+        self.biases = biases
+        self.activations = [ACTIVATIONS[name] for name in activations]
+        self.action_low = action_low
+        self.action_high = action_high
+        self.observation_shape = tuple(observation_shape)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            num_layers = int(data["num_layers"])
+            return cls(
+                [data[f"W{i}"] for i in range(num_layers)],
+                [data[f"b{i}"] for i in range(num_layers)],
+                [str(name) for name in data["activations"]],
+                data["action_low"],
+                data["action_high"],
+                data["observation_shape"],
+            )
+
+    def predict(self, observation, deterministic=True):
+        """
+        Same call signature as `PPO.predict`; only the deterministic action
+        is available.
+
+        Returns:
+            tuple: (action, None), batched if `observation` is
+        """
+        if not deterministic:
+            raise ValueError("NumpyPolicy only evaluates the deterministic policy")
+        x = np.asarray(observation, dtype=np.float32)
+        single = x.shape == self.observation_shape
+        x = x.reshape(-1, int(np.prod(self.observation_shape)))
+        # Hidden layers, then the action head (the last layer, no activation)
+        for weight, bias, activation in zip(self.weights, self.biases, self.activations):
+            x = activation(x @ weight + bias)
+        actions = np.clip(x @ self.weights[-1] + self.biases[-1], self.action_low, self.action_high)
+        return (actions[0] if single else actions), None
@@ -0,0 +1,98 @@
+import glob
+import json
+import os
+import sys
+
+import numpy as np
+
+DATA_PATH = os.getenv("DATA_PATH")
+PRICE_DATASET_PATH = f"{DATA_PATH}/price_history.npy"
+# Current and archived (.bak) price files
+PRICE_FILE_PATTERNS = (
+    f"{DATA_PATH}/electricity_prices*",
+    f"{DATA_PATH}/fetched_data/electricity_prices*",
+)
+
+
+def _index_path(dataset_path):
+    return f"{os.path.splitext(dataset_path)[0]}.index.json"
+
+
+class PriceDataset:
+    """
+    All archived price series in one memory-mapped float32 array.
+
+    `build()` writes the adjustedPrice values of every price file (duplicates
+    removed) back to back into an .npy file, plus a small JSON index with
+    each series' offset, length and first date. `open()` maps the array
+    read-only, so any number of env processes share the same pages and an
+    episode reset is an array slice without file I/O.
+    """
+
+    def __init__(self, prices, offsets, lengths, dates):
+        self.prices = prices  # float32, all series concatenated
+        self.offsets = offsets
+        self.lengths = lengths
+        self.dates = dates  # First date of each series
+
+    @classmethod
+    def build(cls, price_data_paths, dataset_path):
+        """Compiles `price_data_paths` into `dataset_path` and opens it."""
+        series = {}
+        for path in sorted(price_data_paths):
+            try:
+                with open(path, "r") as f:
+                    items = json.load(f)["data"]
+                prices = tuple(float(item["adjustedPrice"]) for item in items)
+                first_date = items[0]["date"]
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                print(f"Skipping {path}: {e}")
+                continue
+            # The .bak archives repeat the same forecast several times
+            series.setdefault((first_date, prices), path)
+
+        ordered = sorted(series)
+        lengths = np.array([len(prices) for _, prices in ordered], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+        array = np.lib.format.open_memmap(
+            dataset_path, mode="w+", dtype=np.float32, shape=(int(lengths.sum()),))
+        for offset, (_, prices) in zip(offsets, ordered):
+            array[offset:offset + len(prices)] = prices
+        array.flush()
+        del array
+
+        index = {
+            "offsets": offsets.tolist(),
+            "lengths": lengths.tolist(),
+            "dates": [date for date, _ in ordered],
+            "sources": [os.path.basename(series[key]) for key in ordered],
+        }
+        with open(_index_path(dataset_path), "w") as f:
+            json.dump(index, f)
+        print(f"Wrote {len(ordered)} price series ({lengths.sum()} prices) to {dataset_path}")
+        return cls.open(dataset_path)
+
+    @classmethod
+    def open(cls, dataset_path):
+        with open(_index_path(dataset_path), "r") as f:
+            index = json.load(f)
+        return cls(
+            np.load(dataset_path, mmap_mode="r"),
+            np.array(index["offsets"], dtype=np.int64),
+            np.array(index["lengths"], dtype=np.int64),
+            index["dates"],
+        )
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def series(self, i):
+        """Prices of series `i` (a read-only view into the mapped file)."""
+        offset = self.offsets[i]
+        return self.prices[offset:offset + self.lengths[i]]
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or [path for pattern in PRICE_FILE_PATTERNS
+                             for path in glob.glob(pattern)]
+    PriceDataset.build(paths, PRICE_DATASET_PATH)
@@ -2,13 +2,19 @@
 import os
 import json
 import time
-import threading
 import logging
-import paho.mqtt.client as mqtt
-import paho.mqtt.publish as publish
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from dotenv import load_dotenv
-from linear_optimizer import run_optimization
+from forecast_subscriber import ForecastSubscriber
+from schedule_publisher import SchedulePublisher
+from optimizer_engines import ENGINES, DEFAULT_ENGINE, get_engine
+from linear_optimizer import USABLE_STATUSES
+from policy_table import PolicyTable
+from batch_optimizer import BatchOptimizer
+from result_cache import SolverResultCache, make_key, soc_bucket
+from solver_gate import SolverGate, REJECTED_QUEUE_FULL
+from singleflight import SingleFlight
+from metrics import REGISTRY, SOLVER_STATUS, CallbackMetric, Counter, Histogram, time_phase
 
 # --- Configure Logging ---
 logging.basicConfig(
@@ -32,10 +38,68 @@ MQTT_TOPIC_SCHEDULE = os.getenv("MQTT_TOPIC", "battery/schedule/optimal")
 MQTT_TOPIC_FORECAST = os.environ.get(
     "MQTT_TOPIC_FORECAST", "iobroker/userdata/0/tibber-adjusted-prices")
 MQTT_TIMEOUT_SECONDS = 5
+# Forecasts older than this (since last receipt) are rejected with 503
+FORECAST_MAX_AGE_SECONDS = float(
+    os.environ.get("FORECAST_MAX_AGE_SECONDS", 24 * 3600))
+MQTT_RECONNECT_MIN_DELAY_SECONDS = int(
+    os.environ.get("MQTT_RECONNECT_MIN_DELAY_SECONDS", 1))
+MQTT_RECONNECT_MAX_DELAY_SECONDS = int(
+    os.environ.get("MQTT_RECONNECT_MAX_DELAY_SECONDS", 60))
+
+# Optimizer engine used when a request does not specify one ("milp" or "dp")
+OPTIMIZER_ENGINE = os.environ.get("OPTIMIZER_ENGINE", DEFAULT_ENGINE).lower()
+if OPTIMIZER_ENGINE not in ENGINES:
+    raise ValueError(
+        f"Unknown OPTIMIZER_ENGINE '{OPTIMIZER_ENGINE}', expected one of {sorted(ENGINES)}")
+
+# Compute the DP value function on forecast arrival and answer default requests
+# from it (status "Approximate") instead of solving the MILP. Opt-in.
+POLICY_TABLE_ENABLED = os.environ.get(
+    "POLICY_TABLE_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Solver result cache (LRU + TTL), invalidated on every new forecast.
+# With the cache enabled, SOCs are rounded to SOC_QUANTIZATION_PERCENT before
+# solving so that nearby SOCs share one result.
+RESULT_CACHE_ENABLED = os.environ.get(
+    "RESULT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", 256))
+RESULT_CACHE_TTL_SECONDS = float(
+    os.environ.get("RESULT_CACHE_TTL_SECONDS", 900))
+SOC_QUANTIZATION_PERCENT = float(
+    os.environ.get("SOC_QUANTIZATION_PERCENT", 1.0))
+
+# /optimize/batch: worker processes (default: CPU count, divided between the
+# workers under gunicorn, see gunicorn.conf.py) and items per request
+BATCH_MAX_WORKERS = int(os.environ.get("BATCH_MAX_WORKERS", 0)) or None
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", 64))
+
+# Concurrent solves per process; further requests wait in a bounded queue and
+# are rejected with 429 (queue full) or 503 (no slot within the timeout)
+SOLVER_MAX_CONCURRENCY = int(os.environ.get("SOLVER_MAX_CONCURRENCY", 2))
+SOLVER_MAX_QUEUED = int(os.environ.get("SOLVER_MAX_QUEUED", 16))
+SOLVER_QUEUE_TIMEOUT_SECONDS = float(
+    os.environ.get("SOLVER_QUEUE_TIMEOUT_SECONDS", 5.0))
+SOLVER_RETRY_AFTER_SECONDS = int(os.environ.get("SOLVER_RETRY_AFTER_SECONDS", 5))
+# Identical concurrent solves (same forecast, index, SOC, battery, engine)
+# share one computation
+REQUEST_COALESCING_ENABLED = os.environ.get(
+    "REQUEST_COALESCING_ENABLED", "true").lower() in ("1", "true", "yes")
+# Flask's debugger and reloader, only for `python src/app.py` during development
+FLASK_DEBUG = os.environ.get("FLASK_DEBUG", "false").lower() in ("1", "true", "yes")
+
+# QoS of schedule messages (QoS > 0 is queued while the broker is unreachable)
+MQTT_PUBLISH_QOS = int(os.environ.get("MQTT_PUBLISH_QOS", 1))
+# Schedules are published retained and only when (index, changeRate) changed
+MQTT_PUBLISH_RETAIN = os.environ.get(
+    "MQTT_PUBLISH_RETAIN", "true").lower() in ("1", "true", "yes")
+# Schedule payload encoding: "records" (list of per-hour objects) or "columnar"
+MQTT_SCHEDULE_FORMAT = os.environ.get(
+    "MQTT_SCHEDULE_FORMAT", "records").lower()
+if MQTT_SCHEDULE_FORMAT not in ("records", "columnar"):
+    raise ValueError(
+        f"Unknown MQTT_SCHEDULE_FORMAT '{MQTT_SCHEDULE_FORMAT}', expected 'records' or 'columnar'")
 
-MQTT_AUTH = None
 if MQTT_USERNAME:
-    MQTT_AUTH = {'username': MQTT_USERNAME, 'password': MQTT_PASSWORD}
     logger.info("MQTT Authentication: Enabled")
 else:
     logger.info("MQTT Authentication: Disabled (no username specified)")
@@ -51,87 +115,187 @@ DEFAULT_BATTERY_PARAMS = {
 # --- Flask App ---
 app = Flask(__name__)
 
-# --- MQTT Forecast Fetching (with Auth) ---
+# --- MQTT Forecast Subscriber (with Auth) ---
+# Keeps the latest forecast in memory so requests never wait on the broker.
+forecast_subscriber = ForecastSubscriber(
+    MQTT_BROKER, MQTT_PORT, MQTT_TOPIC_FORECAST,
+    username=MQTT_USERNAME, password=MQTT_PASSWORD,
+    max_age_seconds=FORECAST_MAX_AGE_SECONDS,
+    reconnect_min_delay=MQTT_RECONNECT_MIN_DELAY_SECONDS,
+    reconnect_max_delay=MQTT_RECONNECT_MAX_DELAY_SECONDS,
+)
 
+# --- Policy Table: DP value function (rebuilt for DEFAULT_BATTERY_PARAMS on every new forecast) ---
+policy_table = None
 
-def fetch_latest_forecast_from_mqtt(broker, port, topic, timeout, username, password):
-    logger.info(
-        f"Attempting to fetch forecast from MQTT: {broker}:{port} Topic: {topic}")
-    received_event = threading.Event()
-    message_payload = None
 
-    def on_connect(client, userdata, flags, rc):
-        if rc == 0:
-            logger.info(
-                f"MQTT connected successfully, subscribing to {topic}...")
-            client.subscribe(topic)
-        else:
-            logger.error(f"MQTT connection failed with code {rc}")
-            received_event.set()
-
-    def on_message(client, userdata, msg):
-        nonlocal message_payload
-        logger.info(f"Received forecast message on {msg.topic}")
-        try:
-            message_payload = msg.payload.decode('utf-8')
-            if '"data":' not in message_payload:
-                logger.warning(
-                    "Received payload doesn't seem to contain 'data' key.")
-                message_payload = None
-        except Exception as e:
-            logger.error(f"Error decoding MQTT message payload: {e}")
-            message_payload = None
-        finally:
-            received_event.set()
-
-    client_id = f"flask-optimizer-fetcher-{os.getpid()}"
-    client = mqtt.Client(client_id=client_id)
-    client.on_connect = on_connect
-    client.on_message = on_message
-
-    if username:
-        client.username_pw_set(username, password)
-        logger.info("MQTT Fetch Client: Using username/password.")
+def rebuild_policy_table(snapshot):
+    global policy_table
+    table, error = PolicyTable.build(
+        snapshot.forecast, DEFAULT_BATTERY_PARAMS,
+        forecast_hash=snapshot.content_hash,
+    )
+    if error:
+        logger.error(f"Failed to build policy table: {error}")
+        policy_table = None
+        return
+    policy_table = table
+
+
+if POLICY_TABLE_ENABLED:
+    forecast_subscriber.add_listener(rebuild_policy_table)
+
+# --- MQTT Schedule Publisher (with Auth) ---
+# One long-lived connection; requests only enqueue the schedule.
+schedule_publisher = SchedulePublisher(
+    MQTT_BROKER, MQTT_PORT, MQTT_TOPIC_SCHEDULE,
+    username=MQTT_USERNAME, password=MQTT_PASSWORD,
+    qos=MQTT_PUBLISH_QOS,
+    retain=MQTT_PUBLISH_RETAIN,
+    reconnect_min_delay=MQTT_RECONNECT_MIN_DELAY_SECONDS,
+    reconnect_max_delay=MQTT_RECONNECT_MAX_DELAY_SECONDS,
+)
 
+# --- Solver Result Cache ---
+result_cache = None
+if RESULT_CACHE_ENABLED:
+    result_cache = SolverResultCache(
+        max_entries=RESULT_CACHE_MAX_ENTRIES, ttl_seconds=RESULT_CACHE_TTL_SECONDS)
+    forecast_subscriber.add_listener(lambda snapshot: result_cache.clear())
+
+
+def start_mqtt_clients():
+    """
+    Connects the schedule publisher and the forecast subscriber.
+
+    Called by the entry points (`python app.py`, wsgi.py) instead of on
+    import: the batch pool's spawned workers re-import the main module and
+    must not open broker connections of their own.
+    """
+    schedule_publisher.start()
+    forecast_subscriber.start()
+
+# --- Solver Concurrency Limit and Request Coalescing ---
+solver_gate = SolverGate(
+    max_concurrent=SOLVER_MAX_CONCURRENCY, max_queued=SOLVER_MAX_QUEUED,
+    queue_timeout=SOLVER_QUEUE_TIMEOUT_SECONDS)
+
+
+def run_solver(optimizer, *args):
+    """
+    Runs `optimizer(*args)` in a solver slot.
+
+    Returns:
+        tuple: (optimizer result | None, rejection_reason | None)
+    """
+    admitted, reason = solver_gate.acquire()
+    if not admitted:
+        logger.warning(f"Solver saturated ({reason}), rejecting request.")
+        return None, reason
     try:
-        client.connect(broker, port, 60)
-        client.loop_start()
-
-        logger.info(f"Waiting for forecast message (max {timeout} seconds)...")
-        event_triggered = received_event.wait(timeout=timeout)
-
-        client.loop_stop()
-        client.disconnect()
-        logger.info("MQTT fetch client disconnected.")
-
-        if event_triggered and message_payload:
-            logger.info("Forecast data fetched successfully.")
-            return message_payload
-        elif event_triggered and not message_payload:
-            logger.error(
-                "Connection/Message processing error occurred during fetch.")
-            return None
-        else:
-            logger.error(
-                f"Timeout - No forecast message received on {topic} within {timeout}s.")
-            return None
+        return optimizer(*args), None
+    finally:
+        solver_gate.release()
+
+
+inflight_solves = SingleFlight() if REQUEST_COALESCING_ENABLED else None
+
+
+def coalesced_solve(key, optimizer, *args):
+    """
+    `run_solver`, shared with identical requests that are already in flight.
+
+    Returns:
+        tuple: (optimizer result | None, rejection_reason | None)
+    """
+    if inflight_solves is None:
+        return run_solver(optimizer, *args)
+    solved, shared = inflight_solves.do(key, run_solver, optimizer, *args)
+    if shared:
+        logger.info("Coalesced with an identical in-flight optimization.")
+    return solved
+
+
+def solver_busy_response(reason):
+    code = 429 if reason == REJECTED_QUEUE_FULL else 503
+    response = jsonify({"error": f"Optimizer busy ({reason}), retry later"})
+    return response, code, {"Retry-After": str(SOLVER_RETRY_AFTER_SECONDS)}
+
+
+# --- Metrics (GET /metrics) ---
+REQUESTS_TOTAL = REGISTRY.register(Counter(
+    "optimizer_requests_total", "HTTP requests by endpoint and status code.",
+    labelnames=("endpoint", "code")))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "optimizer_request_duration_seconds", "HTTP request latency by endpoint.",
+    labelnames=("endpoint",)))
+
+
+def forecast_age_seconds():
+    snapshot = forecast_subscriber.get_snapshot()
+    return snapshot.age_seconds() if snapshot is not None else None
+
+
+def result_cache_stat(name):
+    return lambda: result_cache.stats()[name] if result_cache is not None else None
+
+
+REGISTRY.register(CallbackMetric(
+    "optimizer_forecast_age_seconds", "Seconds since the cached forecast was received.",
+    forecast_age_seconds))
+REGISTRY.register(CallbackMetric(
+    "optimizer_result_cache_entries", "Entries in the solver result cache.",
+    result_cache_stat("entries")))
+REGISTRY.register(CallbackMetric(
+    "optimizer_result_cache_hit_ratio", "Hit ratio of the solver result cache.",
+    result_cache_stat("hit_rate")))
+REGISTRY.register(CallbackMetric(
+    "optimizer_solver_slots", "Solves running and waiting for a slot in this process.",
+    lambda: {(state,): solver_gate.stats()[state] for state in ("active", "queued")},
+    labelnames=("state",)))
+REGISTRY.register(CallbackMetric(
+    "optimizer_solver_rejected_total", "Requests rejected because the solver was saturated.",
+    lambda: {(reason,): count for reason, count in solver_gate.stats()["rejected"].items()},
+    labelnames=("reason",), metric_type="counter"))
+REGISTRY.register(CallbackMetric(
+    "optimizer_solves_coalesced_total",
+    "Requests answered by an identical in-flight solve instead of solving.",
+    lambda: inflight_solves.stats()["coalesced"] if inflight_solves is not None else None,
+    metric_type="counter"))
+for _stat in ("hits", "misses", "evictions", "invalidations"):
+    REGISTRY.register(CallbackMetric(
+        f"optimizer_result_cache_{_stat}_total", f"Solver result cache {_stat}.",
+        result_cache_stat(_stat), metric_type="counter"))
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed batch responses are counted when their headers are sent
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    REQUESTS_TOTAL.inc(endpoint=endpoint, code=response.status_code)
+    start_time = g.get("request_start")
+    if start_time is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - start_time, endpoint=endpoint)
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Request, phase and solver metrics in the Prometheus text format."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
-    except Exception as e:
-        logger.error(f"MQTT fetch connection or operation failed: {e}")
-        if client.is_connected():
-            try:
-                client.loop_stop(force=True)
-                client.disconnect()
-            except:
-                pass
-        return None
 
 # --- API Endpoint ---
 
 
 @app.route('/optimize', methods=['POST'])
 def optimize_endpoint():
-    logger.info("Received request on /optimize (using MQTT forecast, with auth)")
+    logger.info("Received request on /optimize (using cached MQTT forecast)")
 
     if not request.is_json:
         logger.debug("Request content type is not JSON.")
@@ -140,15 +304,17 @@ def optimize_endpoint():
     data = request.get_json()
     logger.debug(f"Request JSON payload: {data}")
 
-    forecast_json_string = fetch_latest_forecast_from_mqtt(
-        MQTT_BROKER, MQTT_PORT, MQTT_TOPIC_FORECAST, MQTT_TIMEOUT_SECONDS,
-        MQTT_USERNAME, MQTT_PASSWORD
-    )
-
-    if not forecast_json_string:
-        logger.error(
-            f"Failed to fetch forecast data from MQTT topic {MQTT_TOPIC_FORECAST}")
-        return jsonify({"error": f"Failed to fetch forecast data from MQTT topic {MQTT_TOPIC_FORECAST}"}), 503
+    with time_phase("forecast_wait"):
+        if forecast_subscriber.get_snapshot() is None:
+            # Only right after startup: give the retained message a moment to arrive
+            forecast_subscriber.wait_for_forecast(MQTT_TIMEOUT_SECONDS)
+        snapshot, forecast_error = forecast_subscriber.get_forecast()
+    if snapshot is None:
+        logger.error(forecast_error)
+        return jsonify({"error": forecast_error}), 503
+    logger.debug(
+        f"Using cached forecast {snapshot.content_hash[:12]} (age {snapshot.age_seconds():.1f}s)")
+    forecast = snapshot.forecast
 
     initial_soc = data.get('current_soc_percent')
     current_index = data.get('current_time_index')
@@ -161,44 +327,82 @@ def optimize_endpoint():
     battery_params = data.get('battery_params', DEFAULT_BATTERY_PARAMS)
     logger.debug(f"Battery parameters: {battery_params}")
 
+    engine_name = str(data.get('engine') or OPTIMIZER_ENGINE).lower()
+    optimizer = get_engine(engine_name)
+    if optimizer is None:
+        logger.error(f"Unknown optimizer engine: {engine_name}")
+        return jsonify({"error": f"Unknown optimizer engine '{engine_name}', expected one of {sorted(ENGINES)}"}), 400
+
+    table = policy_table
     try:
-        status, results_df, action_now, total_savings = run_optimization(
-            forecast_json_string, initial_soc, current_index, battery_params
-        )
+        # Requests with the default battery and no explicit engine are
+        # answered from the precomputed table instead of solving.
+        if (table is not None and 'engine' not in data
+                and table.covers(snapshot.content_hash, battery_params, current_index)):
+            engine_name = "table"
+            with time_phase("lookup"):
+                status, results, action_now, total_savings = table.optimize(
+                    initial_soc, current_index)
+        elif result_cache is not None:
+            solve_soc = soc_bucket(initial_soc, SOC_QUANTIZATION_PERCENT)
+            with time_phase("lookup"):
+                cache_key = make_key(snapshot.content_hash, current_index,
+                                     solve_soc, battery_params, engine_name)
+                cached = result_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Using cached optimization result.")
+                status, results, action_now, total_savings = cached
+            else:
+                solved, rejected = coalesced_solve(
+                    cache_key, optimizer, forecast, solve_soc, current_index, battery_params)
+                if rejected:
+                    return solver_busy_response(rejected)
+                status, results, action_now, total_savings = solved
+                # Time-limited plans (Incumbent, Heuristic) are not cached
+                if status in ('Optimal', 'Approximate'):
+                    result_cache.put(
+                        cache_key, (status, results, action_now, total_savings))
+        else:
+            solve_key = make_key(snapshot.content_hash, current_index,
+                                 initial_soc, battery_params, engine_name)
+            solved, rejected = coalesced_solve(
+                solve_key, optimizer, forecast, initial_soc, current_index, battery_params)
+            if rejected:
+                return solver_busy_response(rejected)
+            status, results, action_now, total_savings = solved
         logger.debug(
             f"Optimization results: status={status}, action_now={action_now}, total_savings={total_savings}")
     except Exception as e:
         logger.error(f"Error during optimization call: {e}")
+        SOLVER_STATUS.inc(engine=engine_name, status="Error")
         return jsonify({"error": f"Internal optimization error: {e}"}), 500
+    SOLVER_STATUS.inc(engine=engine_name, status=status)
 
     response = {
+        "engine": engine_name,
         "solver_status": status,
         "action_next_hour": action_now,
         "estimated_total_savings": total_savings
     }
 
-    if status == 'Optimal' and results_df is not None:
-        mqtt_payload = format_for_mqtt(results_df)
-        if mqtt_payload:
-            try:
+    # Incumbent/heuristic plans (solver time limit) are published as well,
+    # so the controller always gets a schedule within the latency budget
+    if status in USABLE_STATUSES and results is not None:
+        with time_phase("publish"):
+            mqtt_payload = format_for_mqtt(results, MQTT_SCHEDULE_FORMAT)
+            if mqtt_payload:
                 logger.info(
-                    f"Publishing schedule to MQTT Broker: {MQTT_BROKER}:{MQTT_PORT}, Topic: {MQTT_TOPIC_SCHEDULE}")
+                    f"Queueing schedule for MQTT Broker: {MQTT_BROKER}:{MQTT_PORT}, Topic: {MQTT_TOPIC_SCHEDULE}")
                 logger.debug(f"MQTT payload: {mqtt_payload}")
-                publish.single(
-                    MQTT_TOPIC_SCHEDULE,
-                    payload=mqtt_payload,
-                    hostname=MQTT_BROKER,
-                    port=MQTT_PORT,
-                    auth=MQTT_AUTH
-                )
-                logger.info("MQTT schedule publish successful.")
-                response["mqtt_publish_status"] = "Success"
-            except Exception as e:
-                logger.error(f"Error publishing schedule to MQTT: {e}")
-                response["mqtt_publish_status"] = f"Failed: {e}"
-        else:
-            logger.error("Failed to format results for MQTT publishing.")
-            response["mqtt_publish_status"] = "Failed: Formatting error"
+                message_id, publish_status = schedule_publisher.publish(
+                    mqtt_payload, results.change_hash())
+                if message_id is None:
+                    logger.error(f"Error queueing schedule for MQTT: {publish_status}")
+                response["mqtt_publish_status"] = publish_status
+                response["mqtt_message_id"] = message_id
+            else:
+                logger.error("Failed to format results for MQTT publishing.")
+                response["mqtt_publish_status"] = "Failed: Formatting error"
 
         return jsonify(response), 200
     else:
@@ -207,26 +411,100 @@ def optimize_endpoint():
         return jsonify(response), 500
 
 
-def format_for_mqtt(results_df):
-    if results_df is None:
-        logger.debug("Results DataFrame is None. Cannot format for MQTT.")
-        return None
-    output_data = []
-    required_cols = ["Index", "Hour", "Date", "ChangeRate"]
-    if not all(col in results_df.columns for col in required_cols):
-        logger.error(
-            "Results DataFrame missing required columns for MQTT formatting.")
+batch_optimizer = BatchOptimizer(max_workers=BATCH_MAX_WORKERS)
+
+
+@app.route('/optimize/batch', methods=['POST'])
+def optimize_batch_endpoint():
+    """
+    Solves many {current_soc_percent, current_time_index, battery_params}
+    items against the cached forecast in a process pool. Results are streamed
+    as NDJSON in completion order (one line per item, tagged with its
+    position), or returned as one JSON document with "stream": false.
+    Batch schedules are not published to MQTT.
+    """
+    logger.info("Received request on /optimize/batch")
+
+    if not request.is_json:
+        return jsonify({"error": "Request must be JSON"}), 400
+    data = request.get_json()
+
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Field 'items' must be a non-empty list"}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"Too many items ({len(items)} > {BATCH_MAX_ITEMS})"}), 400
+
+    if forecast_subscriber.get_snapshot() is None:
+        forecast_subscriber.wait_for_forecast(MQTT_TIMEOUT_SECONDS)
+    snapshot, forecast_error = forecast_subscriber.get_forecast()
+    if snapshot is None:
+        logger.error(forecast_error)
+        return jsonify({"error": forecast_error}), 503
+
+    valid = [(position, item) for position, item in enumerate(items)
+             if isinstance(item, dict)]
+    invalid = [position for position, item in enumerate(items)
+               if not isinstance(item, dict)]
+
+    def generate_results():
+        for position in invalid:
+            yield position, {"error": "Batch item must be a JSON object"}
+        for i, result in batch_optimizer.run(
+                snapshot.forecast, [item for _, item in valid],
+                OPTIMIZER_ENGINE, DEFAULT_BATTERY_PARAMS):
+            if "solver_status" in result:
+                SOLVER_STATUS.inc(engine=result.get("engine", OPTIMIZER_ENGINE),
+                                  status=result["solver_status"])
+            yield valid[i][0], result
+
+    if data.get('stream', True) is False:
+        results = [None] * len(items)
+        for position, result in generate_results():
+            results[position] = result
+        return jsonify({"results": results}), 200
+
+    def generate_lines():
+        for position, result in generate_results():
+            yield json.dumps({"item": position, **result}) + "\n"
+
+    return Response(stream_with_context(generate_lines()),
+                    mimetype='application/x-ndjson')
+
+
+@app.route('/publish/status/<int:message_id>', methods=['GET'])
+def publish_status_endpoint(message_id):
+    """Follow-up delivery status of a schedule queued by /optimize."""
+    status = schedule_publisher.get_status(message_id)
+    if status is None:
+        return jsonify({"error": f"Unknown MQTT message id {message_id}"}), 404
+    return jsonify({"mqtt_message_id": message_id, "mqtt_publish_status": status}), 200
+
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats_endpoint():
+    """Hit/miss counters of the solver result cache."""
+    if result_cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, "soc_quantization_percent": SOC_QUANTIZATION_PERCENT,
+                    **result_cache.stats()}), 200
+
+
+def format_for_mqtt(results, payload_format="records"):
+    """
+    Serializes the schedule for MQTT.
+
+    "records" is the list of per-hour objects consumed by the integrations;
+    "columnar" sends one array per field (changeRate as numbers) and no
+    whitespace, which is several times smaller.
+    """
+    if results is None:
+        logger.debug("Results are None. Cannot format for MQTT.")
         return None
     try:
-        for _, row in results_df.iterrows():
-            output_data.append({
-                "index": int(row["Index"]),
-                "hour": int(row["Hour"]),
-                "date": row["Date"],
-                "changeRate": row["ChangeRate"]
-            })
-        logger.debug(f"Formatted MQTT payload: {output_data}")
-        return json.dumps({"data": output_data})
+        payload = results.to_mqtt_payload(payload_format)
+        logger.debug(f"Formatted MQTT payload: {payload}")
+        return payload
     except Exception as e:
         logger.error(f"Error during MQTT formatting: {e}")
         return None
@@ -238,9 +516,12 @@ if __name__ == '__main__':
     logger.info(f" - Schedule MQTT Topic: {MQTT_TOPIC_SCHEDULE}")
     logger.info(f" - Forecast MQTT Topic: {MQTT_TOPIC_FORECAST}")
     logger.info(f" - MQTT Broker: {MQTT_BROKER}:{MQTT_PORT}")
+    logger.info(f" - Optimizer Engine: {OPTIMIZER_ENGINE}")
     if MQTT_USERNAME:
         logger.info(f" - MQTT User: {MQTT_USERNAME}")
     else:
         logger.info(" - MQTT User: None (Authentication Disabled)")
 
-    app.run(debug=True, host='0.0.0.0', port=5001)
+    start_mqtt_clients()
+    # Development server; production runs under gunicorn (see wsgi.py)
+    app.run(debug=FLASK_DEBUG, host='0.0.0.0', port=5001)
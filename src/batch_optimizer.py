@@ -0,0 +1,92 @@
+# batch_optimizer.py
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from optimizer_engines import ENGINES, get_engine
+
+logger = logging.getLogger(__name__)
+
+
+def solve_batch_item(forecast_data, item, default_engine, default_battery_params):
+    """
+    Solves one batch item. Runs in a worker process, so the result is a plain
+    JSON-serializable dict.
+    """
+    initial_soc = item.get('current_soc_percent')
+    current_index = item.get('current_time_index')
+    if initial_soc is None or current_index is None:
+        return {"error": "Missing required fields: current_soc_percent, current_time_index"}
+
+    engine_name = str(item.get('engine') or default_engine).lower()
+    optimizer = get_engine(engine_name)
+    if optimizer is None:
+        return {"error": f"Unknown optimizer engine '{engine_name}', expected one of {sorted(ENGINES)}"}
+
+    battery_params = item.get('battery_params', default_battery_params)
+    try:
+        status, results, action_now, total_savings = optimizer(
+            forecast_data, initial_soc, current_index, battery_params
+        )
+    except Exception as e:
+        return {"error": f"Internal optimization error: {e}"}
+
+    result = {
+        "engine": engine_name,
+        "solver_status": status,
+        "action_next_hour": action_now,
+        "estimated_total_savings": total_savings,
+    }
+    if results is not None:
+        result["schedule"] = results.to_records()
+    return result
+
+
+class BatchOptimizer:
+    """
+    Fans batch items out over a bounded process pool.
+
+    The pool is created on first use with the 'spawn' start method, so worker
+    processes do not inherit the MQTT network threads of the app process.
+    Spawned workers re-import the main module (app.py under `python app.py`),
+    which is why app.py only connects its MQTT clients from the entry points
+    (see app.start_mqtt_clients), never on import.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(
+                f"Started batch optimizer process pool ({self._executor._max_workers} workers)")
+        return self._executor
+
+    def run(self, forecast_data, items, default_engine, default_battery_params):
+        """
+        Yields (item_position, result_dict) in completion order.
+        """
+        executor = self._get_executor()
+        futures = {
+            executor.submit(solve_batch_item, forecast_data, item,
+                            default_engine, default_battery_params): position
+            for position, item in enumerate(items)
+        }
+        for future in as_completed(futures):
+            position = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Batch item {position} failed: {e}")
+                result = {"error": f"Internal optimization error: {e}"}
+            yield position, result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
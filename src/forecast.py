@@ -0,0 +1,79 @@
+# forecast.py
+import json
+import logging
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library decoder is used without it
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def decode_json(payload):
+    """Decodes a JSON str/bytes payload, with orjson if it is installed."""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+class Forecast:
+    """
+    Validated price forecast as typed NumPy arrays, sorted by index.
+
+    Parsed once when the forecast arrives; the optimizer engines accept it
+    in place of the raw JSON string, so a request only slices the arrays
+    from its start index on.
+    """
+
+    def __init__(self, indices, prices, hours, dates):
+        self.indices = indices  # int64, strictly increasing
+        self.prices = prices  # float64 adjustedPrice per index
+        self.hours = hours  # int64
+        self.dates = dates  # object array of date strings
+
+    @classmethod
+    def parse(cls, payload):
+        """
+        Parses a forecast payload ({"data": [{"index", "hour", "date",
+        "adjustedPrice"}, ...]}), as str, bytes or an already decoded dict.
+
+        Returns:
+            tuple: (Forecast | None, error_string | None)
+        """
+        try:
+            if not isinstance(payload, dict):
+                payload = decode_json(payload)
+            items = payload["data"]
+        except (ValueError, KeyError, TypeError) as e:
+            return None, f"Error parsing forecast data: {e}"
+
+        try:
+            indices = np.fromiter((int(item["index"]) for item in items), dtype=np.int64)
+            prices = np.fromiter(
+                (float(item["adjustedPrice"]) for item in items), dtype=np.float64)
+            hours = np.fromiter((int(item["hour"]) for item in items), dtype=np.int64)
+            dates = np.array([item["date"] for item in items], dtype=object)
+        except (KeyError, ValueError, TypeError) as e:
+            return None, f"Error processing forecast data fields: {e}"
+
+        if not np.all(np.isfinite(prices)):
+            return None, "Error processing forecast data fields: non-finite adjustedPrice"
+
+        # Sorted by index; for duplicate indices the last entry wins
+        order = np.argsort(indices, kind="stable")
+        sorted_indices = indices[order]
+        is_last = np.empty(len(order), dtype=bool)
+        is_last[:-1] = sorted_indices[1:] != sorted_indices[:-1]
+        is_last[-1:] = True
+        order = order[is_last]
+        return cls(indices[order], prices[order], hours[order], dates[order]), None
+
+    def __len__(self):
+        return len(self.indices)
+
+    def start_position(self, current_time_index):
+        """Position of the first index >= `current_time_index`."""
+        return int(np.searchsorted(self.indices, int(current_time_index)))
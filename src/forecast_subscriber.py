@@ -0,0 +1,131 @@
+# forecast_subscriber.py
+import hashlib
+import logging
+import threading
+import time
+
+from forecast import Forecast
+from mqtt_client import MqttClient
+
+logger = logging.getLogger(__name__)
+
+
+class ForecastSnapshot:
+    """The latest forecast payload received from MQTT."""
+
+    def __init__(self, payload, received_at, content_hash, forecast):
+        self.payload = payload  # Raw JSON string as published on the topic
+        self.received_at = received_at  # time.time() of the last receipt
+        self.content_hash = content_hash  # sha256 hex digest of the payload
+        self.forecast = forecast  # Forecast parsed from the payload
+
+    def age_seconds(self, now=None):
+        return (now if now is not None else time.time()) - self.received_at
+
+
+class ForecastSubscriber(MqttClient):
+    """
+    Long-lived MQTT subscriber that keeps the latest forecast in memory.
+
+    Re-subscribes on every (re)connect of the client (see MqttClient).
+    Request handlers read the cached snapshot via `get_forecast()` without
+    touching the broker.
+    """
+
+    name = "forecast subscriber"
+    client_id_prefix = "flask-optimizer-forecast"
+
+    def __init__(
+        self,
+        broker,
+        port,
+        topic,
+        username=None,
+        password=None,
+        max_age_seconds=None,
+        reconnect_min_delay=1,
+        reconnect_max_delay=60,
+    ):
+        super().__init__(broker, port, topic, username, password,
+                         reconnect_min_delay, reconnect_max_delay)
+        self.max_age_seconds = max_age_seconds
+        self._received_event = threading.Event()
+        self._snapshot = None
+        self._listeners = []
+
+        self._client.on_message = self._on_message
+
+    def add_listener(self, callback):
+        """
+        Registers `callback(snapshot)`, called on the network thread whenever
+        a forecast with new content arrives.
+        """
+        self._listeners.append(callback)
+
+    def wait_for_forecast(self, timeout):
+        """Block until a first forecast has been received (or timeout)."""
+        return self._received_event.wait(timeout=timeout)
+
+    def get_snapshot(self):
+        """Return the latest snapshot regardless of its age (or None)."""
+        with self._lock:
+            return self._snapshot
+
+    def get_forecast(self):
+        """
+        Returns:
+            tuple: (snapshot | None, error_message | None)
+                   The cached snapshot if one is available and not older than
+                   `max_age_seconds`, otherwise None and the reason.
+        """
+        snapshot = self.get_snapshot()
+        if snapshot is None:
+            return None, f"No forecast received yet on MQTT topic {self.topic}"
+        age = snapshot.age_seconds()
+        if self.max_age_seconds is not None and age > self.max_age_seconds:
+            return None, (
+                f"Cached forecast from MQTT topic {self.topic} is stale "
+                f"({age:.0f}s old, max {self.max_age_seconds}s)")
+        return snapshot, None
+
+    # --- paho callbacks (run on the network thread) ---
+
+    def _on_connect(self, client, userdata, flags, rc):
+        super()._on_connect(client, userdata, flags, rc)
+        if rc == 0:
+            logger.info(f"Subscribing to {self.topic}...")
+            client.subscribe(self.topic)
+
+    def _on_message(self, client, userdata, msg):
+        try:
+            payload = msg.payload.decode('utf-8')
+        except Exception as e:
+            logger.error(f"Error decoding MQTT message payload: {e}")
+            return
+
+        content_hash = hashlib.sha256(msg.payload).hexdigest()
+        previous = self.get_snapshot()
+        if previous is not None and previous.content_hash == content_hash:
+            forecast = previous.forecast  # Unchanged, no need to parse again
+        else:
+            forecast, error = Forecast.parse(msg.payload)
+            if error:
+                logger.warning(f"Invalid forecast payload ({error}), keeping previous forecast.")
+                return
+
+        snapshot = ForecastSnapshot(payload, time.time(), content_hash, forecast)
+        with self._lock:
+            previous = self._snapshot
+            self._snapshot = snapshot
+        self._received_event.set()
+
+        if previous is None or previous.content_hash != content_hash:
+            logger.info(
+                f"Received new forecast on {msg.topic} (hash {content_hash[:12]})")
+            for callback in self._listeners:
+                try:
+                    callback(snapshot)
+                except Exception as e:
+                    logger.error(f"Error in forecast listener {callback}: {e}")
+        else:
+            logger.debug(f"Received unchanged forecast on {msg.topic}")
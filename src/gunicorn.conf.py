@@ -0,0 +1,34 @@
+# gunicorn.conf.py
+import multiprocessing
+import os
+import sys
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5001")
+# Solves are CPU bound: one worker process per core, a few threads each for
+# table/cache hits and requests waiting for a solver slot
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT_SECONDS", 30))
+graceful_timeout = 10
+# The MQTT network threads started by wsgi.py would not survive fork, so every
+# worker imports the app (and connects to the broker) on its own
+preload_app = False
+# Every worker starts its own /optimize/batch process pool. Split the cores
+# between them, so that at most
+#   workers * SOLVER_MAX_CONCURRENCY  /optimize solves (in worker threads) and
+#   workers * BATCH_MAX_WORKERS       batch solves (pool processes, ~1 per core)
+# run at once. The workers inherit the environment of the master process.
+os.environ.setdefault(
+    "BATCH_MAX_WORKERS", str(max(multiprocessing.cpu_count() // workers, 1)))
+accesslog = "-"
+
+
+def worker_exit(server, worker):
+    """Disconnects the worker's MQTT clients and stops its batch pool."""
+    app_module = sys.modules.get("app")
+    if app_module is None:
+        return
+    app_module.batch_optimizer.shutdown()
+    app_module.schedule_publisher.stop()
+    app_module.forecast_subscriber.stop()
@@ -1,10 +1,24 @@
 # linear_optimizer.py
 import pulp
-import json
-import pandas as pd
+import numpy as np
 import math
+import os
+import time
 import logging
-from datetime import datetime
+import atexit
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from forecast import Forecast
+from metrics import PHASE_SECONDS, time_phase
+from schedule_result import ScheduleResult
+
+try:
+    from scipy import sparse
+    from scipy.optimize import milp, Bounds, LinearConstraint
+except ImportError:  # SciPy is optional, CBC is used without it
+    milp = None
 
 # --- Configure Logging ---
 logging.basicConfig(
@@ -15,300 +29,902 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Duration (hours) of one forecast step, e.g. 0.25 for 15-minute prices.
+# battery_params may override it per request with "step_hours".
+DEFAULT_STEP_HOURS = float(os.environ.get("FORECAST_STEP_HOURS", 1.0))
+
+# Solve the LP relaxation first and only fall back to the MILP if the relaxed
+# solution charges and discharges in the same step
+LP_RELAXATION_FIRST = os.environ.get(
+    "SOLVER_LP_RELAXATION_FIRST", "true").lower() in ("1", "true", "yes")
+
+# Latency budget of one MILP solve (LP relaxation included); when it runs
+# out the best incumbent is used, or the DP plan if there is none
+SOLVER_TIME_LIMIT_SECONDS = float(
+    os.environ.get("SOLVER_TIME_LIMIT_SECONDS", 2.0)) or None
+# Relative MIP gap at which the MILP stops (solver default if unset)
+SOLVER_MIP_GAP = float(os.environ["SOLVER_MIP_GAP"]) if os.environ.get(
+    "SOLVER_MIP_GAP") else None
+
+# Solver statuses that come with a schedule:
+#   Optimal   - proven optimal (within SOLVER_MIP_GAP)
+#   Incumbent - best integer solution found within the time limit
+#   Heuristic - time limit hit and the DP plan was better than any incumbent
+#   Approximate - DP plan, optimal on its SOC grid (dp engine, policy table)
+USABLE_STATUSES = ("Optimal", "Incumbent", "Heuristic", "Approximate")
+
+# Adjacent steps whose prices differ by at most this much are merged into one
+# block before the MILP solve (0 disables horizon compression)
+COMPRESSION_PRICE_TOLERANCE = float(
+    os.environ.get("HORIZON_COMPRESSION_TOLERANCE", 0.0))
+
+# Threads per CBC process; several app workers solve concurrently, so CBC
+# should not claim every core for itself
+CBC_THREADS = int(os.environ.get("CBC_THREADS", 1))
+
+
+class BatteryProblem:
+    """
+    Parsed forecast and battery parameters for one optimization horizon.
 
-def run_optimization(
-    forecast_data_json, initial_soc_percent, current_time_index, battery_params
+    Shared by all optimizer engines so they solve exactly the same problem.
+    The per-step fields (indices, prices, hours, dates) are NumPy arrays
+    aligned with the optimization horizon (step t = 0..T-1).
+    """
+
+    def __init__(
+        self,
+        capacity_kwh,
+        max_charge_rate_kw,
+        max_discharge_rate_kw,
+        min_soc_percent,
+        efficiency_roundtrip,
+        initial_soc_percent,
+        current_time_index,
+        indices,
+        prices,
+        hours,
+        dates,
+        step_hours=DEFAULT_STEP_HOURS,
+        step_counts=None,
+    ):
+        self.capacity_kwh = capacity_kwh
+        self.max_charge_rate_kw = max_charge_rate_kw
+        self.max_discharge_rate_kw = max_discharge_rate_kw
+        self.min_soc_percent = min_soc_percent
+        self.efficiency_roundtrip = efficiency_roundtrip
+        self.initial_soc_percent = initial_soc_percent
+        self.current_time_index = current_time_index
+        self.indices = indices
+        self.prices = prices
+        self.hours = hours
+        self.dates = dates
+        self.step_hours = step_hours
+        # Forecast steps merged into each step of a compressed problem
+        self.step_counts = step_counts
+
+        # Derived Parameters
+        self.min_soc_kwh = capacity_kwh * (min_soc_percent / 100.0)
+        self.max_soc_kwh = capacity_kwh
+        initial_soc_kwh = capacity_kwh * (initial_soc_percent / 100.0)
+        # Ensure initial SOC is within [min, max]
+        self.initial_soc_kwh = min(
+            max(initial_soc_kwh, self.min_soc_kwh), self.max_soc_kwh)
+        self.efficiency_oneway = math.sqrt(efficiency_roundtrip)
+        self.inv_efficiency_oneway = 1.0 / self.efficiency_oneway
+        # Energy per step
+        self.max_charge_energy_per_step = max_charge_rate_kw * step_hours
+        self.max_discharge_energy_per_step = max_discharge_rate_kw * step_hours
+
+    @property
+    def charge_limits(self):
+        """Maximum charge energy (kWh) of every step."""
+        if self.step_counts is None:
+            return np.full(self.horizon, self.max_charge_energy_per_step)
+        return self.max_charge_energy_per_step * np.asarray(self.step_counts, dtype=np.float64)
+
+    @property
+    def discharge_limits(self):
+        """Maximum discharge energy (kWh) of every step."""
+        if self.step_counts is None:
+            return np.full(self.horizon, self.max_discharge_energy_per_step)
+        return self.max_discharge_energy_per_step * np.asarray(self.step_counts, dtype=np.float64)
+
+    @property
+    def horizon(self):
+        return len(self.indices)
+
+    def from_step(self, start, initial_soc_percent):
+        """The same problem restricted to steps start..T-1."""
+        return BatteryProblem(
+            capacity_kwh=self.capacity_kwh,
+            max_charge_rate_kw=self.max_charge_rate_kw,
+            max_discharge_rate_kw=self.max_discharge_rate_kw,
+            min_soc_percent=self.min_soc_percent,
+            efficiency_roundtrip=self.efficiency_roundtrip,
+            initial_soc_percent=float(initial_soc_percent),
+            current_time_index=self.indices[start],
+            indices=self.indices[start:],
+            prices=self.prices[start:],
+            hours=self.hours[start:],
+            dates=self.dates[start:],
+            step_hours=self.step_hours,
+            step_counts=None if self.step_counts is None else self.step_counts[start:],
+        )
+
+    def log_parameters(self):
+        logger.debug("--- Running Optimization ---")
+        logger.debug(f"Battery Capacity: {self.capacity_kwh} kWh")
+        logger.debug(
+            f"Min SOC: {self.min_soc_percent}% ({self.min_soc_kwh:.2f} kWh)")
+        logger.debug(f"Max Charge Rate: {self.max_charge_rate_kw} kW")
+        logger.debug(f"Max Discharge Rate: {self.max_discharge_rate_kw} kW")
+        logger.debug(
+            f"Round-trip Efficiency: {self.efficiency_roundtrip*100:.1f}% (One-way: {self.efficiency_oneway*100:.1f}%)"
+        )
+        logger.debug(
+            f"Current Time Index: {self.current_time_index} (Hour {self.hours[0] if self.indices[0] == self.current_time_index else 'N/A'})"
+        )
+        logger.debug(
+            f"Initial SOC: {self.initial_soc_percent}% ({self.initial_soc_kwh:.2f} kWh)")
+        logger.debug(
+            f"Optimization Horizon: {self.horizon} steps of {self.step_hours} h (Indices {self.indices[0]} to {self.indices[-1]})"
+        )
+        logger.debug("-------------------------")
+
+
+@time_phase("prepare")
+def prepare_problem(
+    forecast_data, initial_soc_percent, current_time_index, battery_params
 ):
     """
-    Runs the battery schedule optimization.
+    Validates the optimizer inputs.
 
     Args:
-        forecast_data_json (str): JSON string containing the forecast data.
-        initial_soc_percent (float): Current battery SOC (0-100).
-        current_time_index (int): The starting index in the forecast data.
-        battery_params (dict): Dictionary with battery parameters like
-                               'capacity_kwh', 'max_charge_rate_kw', 'max_discharge_rate_kw',
-                               'min_soc_percent', 'efficiency_roundtrip'.
+        forecast_data (Forecast | str): Parsed forecast, or its JSON payload
+            (parsed on every call).
 
     Returns:
-        tuple: (status_string, results_df | None, action_now | None, total_savings | None)
-               Returns optimization status, DataFrame with the schedule,
-               the action for the immediate next hour, and total savings.
-               Returns None for DataFrame, action, and savings if optimization fails.
+        tuple: (BatteryProblem | None, error_string | None)
     """
-    try:
-        forecast_data = json.loads(forecast_data_json)["data"]
-    except (json.JSONDecodeError, KeyError) as e:
-        logger.error(f"Error parsing forecast data: {e}")
-        return f"Error parsing forecast data: {e}", None, None, None
+    if not isinstance(forecast_data, Forecast):
+        forecast_data, error = Forecast.parse(forecast_data)
+        if error:
+            logger.error(error)
+            return None, error
 
     # Battery Parameters from dict
     try:
-        BATT_CAPACITY_KWH = float(battery_params["capacity_kwh"])
-        BATT_MAX_CHARGE_RATE_KW = float(battery_params["max_charge_rate_kw"])
-        BATT_MAX_DISCHARGE_RATE_KW = float(
-            battery_params["max_discharge_rate_kw"])
-        BATT_MIN_SOC_PERCENT = float(battery_params["min_soc_percent"])
-        BATT_EFFICIENCY_ROUNDTRIP = float(
-            battery_params["efficiency_roundtrip"])
-    except (KeyError, ValueError) as e:
+        capacity_kwh = float(battery_params["capacity_kwh"])
+        max_charge_rate_kw = float(battery_params["max_charge_rate_kw"])
+        max_discharge_rate_kw = float(battery_params["max_discharge_rate_kw"])
+        min_soc_percent = float(battery_params["min_soc_percent"])
+        efficiency_roundtrip = float(battery_params["efficiency_roundtrip"])
+        step_hours = float(battery_params.get("step_hours", DEFAULT_STEP_HOURS))
+    except (KeyError, ValueError, TypeError) as e:
         logger.error(f"Error parsing battery parameters: {e}")
-        return f"Error parsing battery parameters: {e}", None, None, None
-
-    # Simulation Parameters
-    CURRENT_SOC_PERCENT = float(initial_soc_percent)
-    CURRENT_TIME_INDEX = int(current_time_index)
-
-    # Derived Parameters
-    BATT_MIN_SOC_KWH = BATT_CAPACITY_KWH * (BATT_MIN_SOC_PERCENT / 100.0)
-    BATT_MAX_SOC_KWH = BATT_CAPACITY_KWH
-    INITIAL_SOC_KWH = BATT_CAPACITY_KWH * (CURRENT_SOC_PERCENT / 100.0)
-    if INITIAL_SOC_KWH < BATT_MIN_SOC_KWH:
-        INITIAL_SOC_KWH = BATT_MIN_SOC_KWH  # Ensure initial SOC is not below min
-    if INITIAL_SOC_KWH > BATT_MAX_SOC_KWH:
-        INITIAL_SOC_KWH = BATT_MAX_SOC_KWH  # Ensure initial SOC is not above max
-    try:
-        BATT_EFFICIENCY_ONEWAY = math.sqrt(BATT_EFFICIENCY_ROUNDTRIP)
-        INV_BATT_EFFICIENCY_ONEWAY = 1.0 / BATT_EFFICIENCY_ONEWAY
-    except ValueError:
+        return None, f"Error parsing battery parameters: {e}"
+
+    if efficiency_roundtrip < 0:
         logger.error("Error calculating efficiency (sqrt negative?)")
-        return f"Error calculating efficiency (sqrt negative?)", None, None, None
-    except ZeroDivisionError:
+        return None, "Error calculating efficiency (sqrt negative?)"
+    if efficiency_roundtrip == 0:
         logger.error("Error calculating efficiency (zero efficiency?)")
-        return f"Error calculating efficiency (zero efficiency?)", None, None, None
+        return None, "Error calculating efficiency (zero efficiency?)"
+    if not step_hours > 0:
+        logger.error(f"Invalid step duration: {step_hours} h")
+        return None, f"Invalid step duration: {step_hours} h"
+
+    # Optimization period: every forecast step from the current index on
+    current_time_index = int(current_time_index)
+    start = forecast_data.start_position(current_time_index)
+    if start >= len(forecast_data):
+        logger.error("No future time steps found for optimization.")
+        return None, "No future time steps found for optimization."
+
+    problem = BatteryProblem(
+        capacity_kwh=capacity_kwh,
+        max_charge_rate_kw=max_charge_rate_kw,
+        max_discharge_rate_kw=max_discharge_rate_kw,
+        min_soc_percent=min_soc_percent,
+        efficiency_roundtrip=efficiency_roundtrip,
+        initial_soc_percent=float(initial_soc_percent),
+        current_time_index=current_time_index,
+        indices=forecast_data.indices[start:],
+        prices=forecast_data.prices[start:],
+        hours=forecast_data.hours[start:],
+        dates=forecast_data.dates[start:],
+        step_hours=step_hours,
+    )
+    return problem, None
 
-    BATT_MAX_CHARGE_ENERGY_PER_STEP = BATT_MAX_CHARGE_RATE_KW * \
-        1.0  # Charge Energy in 1 hour
-    BATT_MAX_DISCHARGE_ENERGY_PER_STEP = BATT_MAX_DISCHARGE_RATE_KW * \
-        1.0  # Discharge Energy in 1 hour
 
-    # Extract relevant forecast data
-    try:
-        prices = {item["index"]: float(item["adjustedPrice"])
-                  for item in forecast_data}
-        hours = {item["index"]: item["hour"] for item in forecast_data}
-        dates = {item["index"]: item["date"] for item in forecast_data}
-    except (KeyError, ValueError, TypeError) as e:
-        logger.error(f"Error processing forecast data fields: {e}")
-        return f"Error processing forecast data fields: {e}", None, None, None
+def compress_problem(problem, price_tolerance):
+    """
+    Merges runs of adjacent steps whose prices lie within `price_tolerance`
+    of each other into single blocks.
 
-    indices = sorted(prices.keys())
+    A block is priced at the mean of its steps and may move the energy of
+    all its steps (the rate limits scale with the block length). Spreading a
+    block's energy evenly over its steps earns exactly the block's savings
+    and keeps the SOC within bounds, so the reduced solution expands to a
+    feasible schedule; only the freedom inside a block is lost.
 
-    # Filter indices for the optimization period
-    optimization_indices = [i for i in indices if i >= CURRENT_TIME_INDEX]
-    if not optimization_indices:
-        logger.error("No future time steps found for optimization.")
-        return "No future time steps found for optimization.", None, None, None
+    Returns:
+        tuple: (compressed BatteryProblem, block_lengths array)
+    """
+    prices = problem.prices.tolist()
+    starts = [0]
+    low = high = prices[0]
+    for t in range(1, problem.horizon):
+        low = min(low, prices[t])
+        high = max(high, prices[t])
+        if high - low > price_tolerance:
+            starts.append(t)
+            low = high = prices[t]
+    starts = np.array(starts)
+    block_lengths = np.diff(np.append(starts, problem.horizon))
+
+    compressed = BatteryProblem(
+        capacity_kwh=problem.capacity_kwh,
+        max_charge_rate_kw=problem.max_charge_rate_kw,
+        max_discharge_rate_kw=problem.max_discharge_rate_kw,
+        min_soc_percent=problem.min_soc_percent,
+        efficiency_roundtrip=problem.efficiency_roundtrip,
+        initial_soc_percent=problem.initial_soc_percent,
+        current_time_index=problem.current_time_index,
+        indices=problem.indices[starts],
+        prices=np.add.reduceat(problem.prices, starts) / block_lengths,
+        hours=problem.hours[starts],
+        dates=problem.dates[starts],
+        step_hours=problem.step_hours,
+        step_counts=block_lengths,
+    )
+    return compressed, block_lengths
 
-    # Number of time steps in optimization horizon
-    T = len(optimization_indices)
-    opt_idx_map = {
-        t: optimization_indices[t] for t in range(T)
-    }  # Map step t to original index
 
-    # --- Logging Parameters ---
-    logger.debug("--- Running Optimization ---")
-    logger.debug(f"Battery Capacity: {BATT_CAPACITY_KWH} kWh")
-    logger.debug(
-        f"Min SOC: {BATT_MIN_SOC_PERCENT}% ({BATT_MIN_SOC_KWH:.2f} kWh)")
-    logger.debug(f"Max Charge Rate: {BATT_MAX_CHARGE_RATE_KW} kW")
-    logger.debug(f"Max Discharge Rate: {BATT_MAX_DISCHARGE_RATE_KW} kW")
+def expand_solution(problem, block_lengths, result):
+    """
+    Spreads the block solution of a compressed problem evenly over the
+    original steps.
 
-    logger.debug(
-        f"Round-trip Efficiency: {BATT_EFFICIENCY_ROUNDTRIP*100:.1f}% (One-way: {BATT_EFFICIENCY_ONEWAY*100:.1f}%)"
-    )
-    logger.debug(
-        f"Current Time Index: {CURRENT_TIME_INDEX} (Hour {hours.get(CURRENT_TIME_INDEX, 'N/A')})"
-    )
-    logger.debug(
-        f"Initial SOC: {CURRENT_SOC_PERCENT}% ({INITIAL_SOC_KWH:.2f} kWh)")
-    logger.debug(
-        f"Optimization Horizon: {T} hours (Indices {optimization_indices[0]} to {optimization_indices[-1]})"
-    )
-    logger.debug("-------------------------")
-    # --- End Logging ---
-
-    # Create the MILP Problem
-    prob = pulp.LpProblem("Battery_Schedule_Optimization", pulp.LpMaximize)
-
-    # Define Decision Variables
-    time_steps = range(T)
-    charge_vars = pulp.LpVariable.dicts(
-        "Charge",
-        time_steps,
-        lowBound=0,
-        upBound=BATT_MAX_CHARGE_ENERGY_PER_STEP,
-        cat="Continuous",
-    )
-    discharge_vars = pulp.LpVariable.dicts(
-        "Discharge",
-        time_steps,
-        lowBound=0,
-        upBound=BATT_MAX_DISCHARGE_ENERGY_PER_STEP,
-        cat="Continuous",
+    Returns:
+        SolveResult: Per-step solution of `problem` (unchanged objective);
+                     `result` itself if it has no solution.
+    """
+    if result.charges is None:
+        return result
+    lengths = np.asarray(block_lengths)
+    charges = np.repeat(np.asarray(result.charges, dtype=np.float64) / lengths, lengths)
+    discharges = np.repeat(np.asarray(result.discharges, dtype=np.float64) / lengths, lengths)
+    # Net SOC change per step is constant within a block
+    block_socs = np.asarray(result.socs, dtype=np.float64)
+    block_starts = np.concatenate(([problem.initial_soc_kwh], block_socs[:-1]))
+    position = np.concatenate([np.arange(1, n + 1) / n for n in block_lengths])
+    socs = np.repeat(block_starts, lengths) + position * np.repeat(
+        block_socs - block_starts, lengths)
+    return SolveResult(result.status_string, charges, discharges, socs,
+                       result.objective, result.method)
+
+
+@time_phase("results")
+def build_results(problem, charges, discharges, socs):
+    """
+    Compiles the per-step schedule of a solved problem.
+
+    Args:
+        problem (BatteryProblem): The solved problem.
+        charges, discharges, socs (sequence[float | None]): Per-step charge and
+            discharge energy (kWh, both >= 0) and end-of-step SOC (kWh).
+
+    Returns:
+        tuple: (ScheduleResult, action_now)
+    """
+    results = ScheduleResult.from_solution(problem, charges, discharges, socs)
+    action_now = results.action_now
+
+    logger.info(
+        f"Action for the next step (Index {problem.indices[0]}): {action_now} kW"
     )
-    soc_vars = pulp.LpVariable.dicts(
-        "SOC",
-        time_steps,
-        lowBound=BATT_MIN_SOC_KWH,
-        upBound=BATT_MAX_SOC_KWH,
-        cat="Continuous",
+    # Log the summarized plan of the next 12 steps
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            f"Plan for the next 12 steps ({12 * problem.step_hours:g} h): "
+            + results.plan_summary(12))
+
+    logger.debug("--- Optimal Plan Generated ---")
+    return results, action_now
+
+
+class SolveResult:
+    """Raw solution of one backend solve (per-step lists are None on failure)."""
+
+    def __init__(self, status_string, charges=None, discharges=None, socs=None,
+                 objective=None, method="milp"):
+        self.status_string = status_string
+        self.charges = charges
+        self.discharges = discharges
+        self.socs = socs
+        self.objective = objective
+        self.method = method  # "lp" if the relaxation was already integral
+
+
+# Energies (kWh) above this count as charging/discharging in a step
+SIMULTANEOUS_TOLERANCE_KWH = 1e-6
+
+
+def is_simultaneous(charges, discharges):
+    """True if any step both charges and discharges."""
+    return bool(np.any(
+        (np.asarray(charges, dtype=np.float64) > SIMULTANEOUS_TOLERANCE_KWH)
+        & (np.asarray(discharges, dtype=np.float64) > SIMULTANEOUS_TOLERANCE_KWH)))
+
+
+# --- Solver Backends ---
+#
+# Each backend keeps a model template per horizon length and battery
+# configuration. Building the template is the expensive part; a solve only
+# rewrites the price coefficients of the objective and the initial SOC on the
+# right-hand side of the first SOC balance constraint.
+#
+# The binaries only forbid charging and discharging in the same step. With a
+# round-trip efficiency below 100% that is a loss unless prices are negative,
+# so the LP relaxation is usually integral already: if it is, it is also the
+# MILP optimum and branch and bound is skipped. Otherwise the MILP is solved.
+
+
+def template_key(problem):
+    """Everything except prices and initial SOC that shapes the model."""
+    return (
+        problem.horizon,
+        problem.min_soc_kwh,
+        problem.max_soc_kwh,
+        problem.efficiency_oneway,
+        problem.max_charge_energy_per_step,
+        problem.max_discharge_energy_per_step,
+        None if problem.step_counts is None else tuple(problem.step_counts),
     )
-    is_charging = pulp.LpVariable.dicts("IsCharging", time_steps, cat="Binary")
-    is_discharging = pulp.LpVariable.dicts(
-        "IsDischarging", time_steps, cat="Binary")
-
-    # Define Objective Function (Maximize Savings)
-    prob += (
-        pulp.lpSum(
-            discharge_vars[t] * prices[opt_idx_map[t]]
-            - charge_vars[t] * prices[opt_idx_map[t]]
+
+
+class _CbcTemplate:
+    """PuLP model of the battery MILP, solved with the CBC command line solver."""
+
+    def __init__(self, problem):
+        T = problem.horizon
+        BATT_MIN_SOC_KWH = problem.min_soc_kwh
+        BATT_MAX_SOC_KWH = problem.max_soc_kwh
+        INITIAL_SOC_KWH = problem.initial_soc_kwh
+        BATT_EFFICIENCY_ONEWAY = problem.efficiency_oneway
+        INV_BATT_EFFICIENCY_ONEWAY = problem.inv_efficiency_oneway
+        # Per step, since steps of a compressed problem span several forecast steps
+        BATT_MAX_CHARGE_ENERGY = problem.charge_limits.tolist()
+        BATT_MAX_DISCHARGE_ENERGY = problem.discharge_limits.tolist()
+        prices = [float(price) for price in problem.prices]
+
+        # Create the MILP Problem
+        prob = pulp.LpProblem("Battery_Schedule_Optimization", pulp.LpMaximize)
+
+        # Define Decision Variables
+        time_steps = range(T)
+        charge_vars = {
+            t: pulp.LpVariable(f"Charge_{t}", lowBound=0,
+                               upBound=BATT_MAX_CHARGE_ENERGY[t], cat="Continuous")
             for t in time_steps
-        ),
-        "Total Savings",
-    )
+        }
+        discharge_vars = {
+            t: pulp.LpVariable(f"Discharge_{t}", lowBound=0,
+                               upBound=BATT_MAX_DISCHARGE_ENERGY[t], cat="Continuous")
+            for t in time_steps
+        }
+        soc_vars = pulp.LpVariable.dicts(
+            "SOC",
+            time_steps,
+            lowBound=BATT_MIN_SOC_KWH,
+            upBound=BATT_MAX_SOC_KWH,
+            cat="Continuous",
+        )
+        is_charging = pulp.LpVariable.dicts(
+            "IsCharging", time_steps, cat="Binary")
+        is_discharging = pulp.LpVariable.dicts(
+            "IsDischarging", time_steps, cat="Binary")
 
-    # Define Constraints
-    for t in time_steps:
-        idx = opt_idx_map[t]  # Original forecast index for this step
+        # Define Objective Function (Maximize Savings)
+        prob += (
+            pulp.lpSum(
+                discharge_vars[t] * prices[t]
+                - charge_vars[t] * prices[t]
+                for t in time_steps
+            ),
+            "Total Savings",
+        )
 
-        # SOC Balance Constraint
-        if t == 0:
+        # Define Constraints
+        for t in time_steps:
+            # SOC Balance Constraint
+            if t == 0:
+                prob += (
+                    soc_vars[t]
+                    == INITIAL_SOC_KWH
+                    + charge_vars[t] * BATT_EFFICIENCY_ONEWAY
+                    - discharge_vars[t] * INV_BATT_EFFICIENCY_ONEWAY,
+                    f"SOC_Balance_{t}",
+                )
+            else:
+                prob += (
+                    soc_vars[t]
+                    == soc_vars[t - 1]
+                    + charge_vars[t] * BATT_EFFICIENCY_ONEWAY
+                    - discharge_vars[t] * INV_BATT_EFFICIENCY_ONEWAY,
+                    f"SOC_Balance_{t}",
+                )
+
+            # Enforce Charge/Discharge Rate Limits using Binary Variables
             prob += (
-                soc_vars[t]
-                == INITIAL_SOC_KWH
-                + charge_vars[t] * BATT_EFFICIENCY_ONEWAY
-                - discharge_vars[t] * INV_BATT_EFFICIENCY_ONEWAY,
-                f"SOC_Balance_{t}",
+                charge_vars[t] <= is_charging[t] *
+                BATT_MAX_CHARGE_ENERGY[t],
+                f"Charge_Rate_{t}",
             )
-        else:
             prob += (
-                soc_vars[t]
-                == soc_vars[t - 1]
-                + charge_vars[t] * BATT_EFFICIENCY_ONEWAY
-                - discharge_vars[t] * INV_BATT_EFFICIENCY_ONEWAY,
-                f"SOC_Balance_{t}",
+                discharge_vars[t] <= is_discharging[t] *
+                BATT_MAX_DISCHARGE_ENERGY[t],
+                f"Discharge_Rate_{t}",
             )
 
-        # Enforce Charge/Discharge Rate Limits using Binary Variables
-        prob += (
-            charge_vars[t] <= is_charging[t] * BATT_MAX_CHARGE_ENERGY_PER_STEP,
-            f"Charge_Rate_{t}",
-        )
-        prob += (
-            discharge_vars[t] <= is_discharging[t] *
-            BATT_MAX_DISCHARGE_ENERGY_PER_STEP,
-            f"Discharge_Rate_{t}",
+            # Mutual Exclusivity Constraint
+            prob += is_charging[t] + \
+                is_discharging[t] <= 1, f"Mutual_Exclusivity_{t}"
+
+        self.prob = prob
+        self.time_steps = time_steps
+        self.charge_vars = charge_vars
+        self.discharge_vars = discharge_vars
+        self.soc_vars = soc_vars
+        self.is_charging = is_charging
+        self.is_discharging = is_discharging
+        # The PuLP model is mutated per solve and CBC reads it back into it
+        self.lock = threading.Lock()
+
+    def solve(self, problem, relax_first=False, time_limit=None, mip_gap=None):
+        if time_limit is not None and time_limit <= 0:
+            return SolveResult("Not Solved")
+        prob = self.prob
+        deadline = _deadline(time_limit)
+        with self.lock:
+            # Only the price coefficients and the initial SOC change
+            for t, price in zip(self.time_steps, problem.prices.tolist()):
+                prob.objective[self.charge_vars[t]] = -price
+                prob.objective[self.discharge_vars[t]] = price
+            prob.constraints["SOC_Balance_0"].changeRHS(
+                problem.initial_soc_kwh)
+
+            if relax_first:
+                # A negative time limit would mean no limit for the solver
+                remaining = _remaining(deadline)
+                if remaining is not None and remaining <= 0:
+                    return SolveResult("Not Solved")
+                binaries = list(self.is_charging.values()) + \
+                    list(self.is_discharging.values())
+                for var in binaries:
+                    var.cat = pulp.LpContinuous
+                try:
+                    result = self._solve_once("lp", remaining, None)
+                finally:
+                    for var in binaries:
+                        var.cat = pulp.LpInteger
+                if result.status_string == "Optimal" and not is_simultaneous(
+                        result.charges, result.discharges):
+                    return result
+            remaining = _remaining(deadline)
+            if remaining is not None and remaining <= 0:
+                return SolveResult("Not Solved")
+            return self._solve_once("milp", remaining, mip_gap)
+
+    def _solve_once(self, method, time_limit, mip_gap):
+        solver = pulp.PULP_CBC_CMD(
+            msg=0, timeLimit=time_limit, gapRel=mip_gap,  # Suppress solver messages
+            threads=CBC_THREADS)
+        solver.tmpDir = _cbc_tmp_dir()
+        status = self.prob.solve(solver)
+        status_string = pulp.LpStatus[status]
+        if status_string != "Optimal":
+            return SolveResult(status_string, method=method)
+        if self.prob.sol_status == pulp.LpSolutionIntegerFeasible:
+            status_string = "Incumbent"  # Stopped by the time limit
+
+        return SolveResult(
+            status_string,
+            [self.charge_vars[t].varValue for t in self.time_steps],
+            [self.discharge_vars[t].varValue for t in self.time_steps],
+            [self.soc_vars[t].varValue for t in self.time_steps],
+            pulp.value(self.prob.objective),
+            method,
         )
 
-        # Mutual Exclusivity Constraint
-        prob += is_charging[t] + \
-            is_discharging[t] <= 1, f"Mutual_Exclusivity_{t}"
 
-    # Solve the Problem
-    logger.info("Solving the optimization problem...")
-    solver = pulp.PULP_CBC_CMD(msg=0)  # Suppress solver messages
-    status = prob.solve(solver)
-    status_string = pulp.LpStatus[status]
-    logger.info(f"Solver Status: {status_string}")
+# scipy.optimize.milp status codes mapped to PuLP's status strings
+_HIGHS_STATUS = {
+    0: "Optimal",
+    1: "Not Solved",  # Iteration or time limit reached
+    2: "Infeasible",
+    3: "Unbounded",
+    4: "Undefined",
+}
 
-    # Extract and Analyze Results
-    results = []
-    action_now = 0  # Default action
-    total_savings = 0.0
 
-    if status_string == "Optimal":
-        total_savings = pulp.value(prob.objective)
-        logger.info(
-            f"Optimal Schedule Found! Max Savings: {total_savings:.4f}")
+class _HighsTemplate:
+    """
+    The same MILP for SciPy's in-process HiGHS interface.
 
-        # Determine action for the next hour (t=0)
-        next_charge = charge_vars[0].varValue
-        next_discharge = discharge_vars[0].varValue
-        if next_charge > 0.01:
-            action_now = next_charge
-        elif next_discharge > 0.01:
-            action_now = -1 * next_discharge
+    Variables are stacked as x = [Charge, Discharge, SOC, IsCharging,
+    IsDischarging] (T each) and the constraints are assembled directly as a
+    sparse matrix, so no model files or solver processes are involved.
+    """
 
-        logger.info(
-            f"Action for Next Hour (Index {optimization_indices[0]}): {action_now}"
+    def __init__(self, problem):
+        T = problem.horizon
+        eta = problem.efficiency_oneway
+        inv_eta = problem.inv_efficiency_oneway
+        max_charge = problem.charge_limits
+        max_discharge = problem.discharge_limits
+
+        charge, discharge, soc, is_charging, is_discharging = (
+            np.arange(T) + k * T for k in range(5))
+        steps = np.arange(T)
+
+        # SOC balance: soc[t] - soc[t-1] - eta * charge[t] + discharge[t] / eta = 0
+        # (initial SOC on the right-hand side for t = 0)
+        rows = [steps, steps[1:], steps, steps]
+        cols = [soc, soc[:-1], charge, discharge]
+        vals = [np.ones(T), -np.ones(T - 1),
+                np.full(T, -eta), np.full(T, inv_eta)]
+        # Rate limits: charge[t] - max_charge * is_charging[t] <= 0 (same for discharge)
+        rows += [T + steps, T + steps, 2 * T + steps, 2 * T + steps]
+        cols += [charge, is_charging, discharge, is_discharging]
+        vals += [np.ones(T), -max_charge, np.ones(T), -max_discharge]
+        # Mutual exclusivity: is_charging[t] + is_discharging[t] <= 1
+        rows += [3 * T + steps, 3 * T + steps]
+        cols += [is_charging, is_discharging]
+        vals += [np.ones(T), np.ones(T)]
+        self.A = sparse.csr_matrix(
+            (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(4 * T, 5 * T))
+
+        self.lower = np.concatenate((np.zeros(T), np.full(3 * T, -np.inf)))
+        self.upper = np.concatenate((np.zeros(T), np.zeros(2 * T), np.ones(T)))
+        self.bounds = Bounds(
+            np.concatenate((np.zeros(2 * T), np.full(T, problem.min_soc_kwh),
+                            np.zeros(2 * T))),
+            np.concatenate((max_charge, max_discharge,
+                            np.full(T, problem.max_soc_kwh), np.ones(2 * T))),
         )
+        self.integrality = np.concatenate((np.zeros(3 * T), np.ones(2 * T)))
+        self.horizon = T
+
+    def solve(self, problem, relax_first=False, time_limit=None, mip_gap=None):
+        if time_limit is not None and time_limit <= 0:
+            return SolveResult("Not Solved")
+        deadline = _deadline(time_limit)
+        T = self.horizon
+        prices = np.asarray(problem.prices, dtype=np.float64)
+        # Maximize sum(price * (discharge - charge)) == minimize the negation
+        objective = np.zeros(5 * T)
+        objective[:T] = prices
+        objective[T:2 * T] = -prices
+        lower = self.lower.copy()
+        upper = self.upper.copy()
+        lower[0] = upper[0] = problem.initial_soc_kwh
+        constraints = LinearConstraint(self.A, lower, upper)
+
+        if relax_first:
+            # A negative time limit would mean no limit for the solver
+            remaining = _remaining(deadline)
+            if remaining is not None and remaining <= 0:
+                return SolveResult("Not Solved")
+            result = self._solve_once(
+                objective, constraints, None, "lp", {"time_limit": remaining})
+            if result.status_string == "Optimal" and not is_simultaneous(
+                    result.charges, result.discharges):
+                return result
+        remaining = _remaining(deadline)
+        if remaining is not None and remaining <= 0:
+            return SolveResult("Not Solved")
+        return self._solve_once(
+            objective, constraints, self.integrality, "milp",
+            {"time_limit": remaining, "mip_rel_gap": mip_gap})
+
+    def _solve_once(self, objective, constraints, integrality, method, options):
+        T = self.horizon
+        res = milp(
+            objective,
+            constraints=constraints,
+            bounds=self.bounds,
+            integrality=integrality,
+            options={k: v for k, v in options.items() if v is not None},
+        )
+        status_string = _HIGHS_STATUS.get(res.status, "Undefined")
+        if status_string == "Not Solved" and res.x is not None and integrality is not None:
+            status_string = "Incumbent"  # Stopped by the time limit
+        elif status_string != "Optimal" or res.x is None:
+            return SolveResult(status_string, method=method)
 
-        # Compile detailed plan
-        cumulative_saving = 0
-        for t in time_steps:
-            idx = opt_idx_map[t]
-            charge = charge_vars[t].varValue if charge_vars[t].varValue else 0.0
-            discharge = (
-                discharge_vars[t].varValue if discharge_vars[t].varValue else 0.0
-            )
-            soc = (
-                soc_vars[t].varValue if soc_vars[t].varValue else BATT_MIN_SOC_KWH
-            )  # Handle potential None
-            price = prices[idx]
-            hourly_saving = (discharge * price) - (charge * price)
-            cumulative_saving += hourly_saving
-
-            action = "Hold"
-            energy = 0.0
-            change_rate = 0.0
-            if charge > 0.01:
-                action = "Charge"
-                energy = charge
-                change_rate = (
-                    energy / BATT_MAX_CHARGE_ENERGY_PER_STEP
-                    if BATT_MAX_CHARGE_ENERGY_PER_STEP > 0
-                    else 0
-                )
-            elif discharge > 0.01:
-                action = "Discharge"
-                energy = -discharge  # Show discharge as negative
-                change_rate = (
-                    energy / BATT_MAX_DISCHARGE_ENERGY_PER_STEP
-                    if BATT_MAX_DISCHARGE_ENERGY_PER_STEP > 0
-                    else 0
-                )
+        x = res.x
+        return SolveResult(
+            status_string, x[:T], x[T:2 * T], x[2 * T:3 * T], -res.fun, method)
 
-            results.append(
-                {
-                    "Index": idx,
-                    "Hour": hours[idx],
-                    "Date": dates[idx],
-                    "Price": price,
-                    "Action": action,
-                    "Energy_kWh": round(energy, 4),
-                    "ChangeRate": f"{change_rate:.2f}",
-                    "SOC_End_Percent": round((soc / BATT_CAPACITY_KWH) * 100.0, 2),
-                    "Hourly_Saving": round(hourly_saving, 4),
-                    "Cumulative_Saving": round(cumulative_saving, 4),
-                }
-            )
 
-        # Summarize the next 12 hours plan
-        next_12_hours_plan = []
-        for t in range(min(12, len(time_steps))):  # Limit to the next 12 hours
-            idx = opt_idx_map[t]
-            charge = charge_vars[t].varValue if charge_vars[t].varValue else 0.0
-            discharge = (
-                discharge_vars[t].varValue if discharge_vars[t].varValue else 0.0
-            )
+_cbc_tmp_dirs = {}  # pid -> directory
+_cbc_tmp_dirs_lock = threading.Lock()
 
-            if charge > 0.01:
-                next_12_hours_plan.append(
-                    f"Hour {hours[idx]}: Charge {charge:.2f} kWh")
-            elif discharge > 0.01:
-                next_12_hours_plan.append(
-                    f"Hour {hours[idx]}: Discharge {discharge:.2f} kWh"
-                )
-            else:
-                next_12_hours_plan.append(f"Hour {hours[idx]}: Hold")
 
-        # Log the summarized 12-hour plan
-        logger.info("Next 12-hour plan: " + " | ".join(next_12_hours_plan))
+def _cbc_tmp_dir():
+    """
+    Per-process directory for CBC's model and solution files, so the
+    processes of a multi-worker server never share (or clean up) each
+    other's files. Removed at exit.
+    """
+    pid = os.getpid()
+    with _cbc_tmp_dirs_lock:
+        path = _cbc_tmp_dirs.get(pid)
+        if path is None:
+            path = _cbc_tmp_dirs[pid] = tempfile.mkdtemp(prefix=f"cbc-{pid}-")
+            atexit.register(shutil.rmtree, path, True)
+    return path
+
+
+def _deadline(time_limit):
+    return None if time_limit is None else time.perf_counter() + time_limit
+
+
+def _remaining(deadline):
+    """Seconds left until `deadline` (None without a limit)."""
+    return None if deadline is None else deadline - time.perf_counter()
+
+
+class _TemplateCache:
+    """Bounded LRU of model templates per (backend, template_key)."""
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, backend, template_class, problem):
+        """
+        Returns:
+            tuple: (template, built) where built is True on a cache miss.
+        """
+        key = (backend, template_key(problem))
+        with self._lock:
+            template = self._templates.get(key)
+            if template is not None:
+                self._templates.move_to_end(key)
+                return template, False
+        template = template_class(problem)
+        with self._lock:
+            template = self._templates.setdefault(key, template)
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+        return template, True
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+_template_cache = _TemplateCache()
+
+
+def clear_template_cache():
+    """Drops all cached model templates, so the next solves build them again."""
+    _template_cache.clear()
+
+
+def _solve_cbc(problem, relax_first=False, time_limit=None, mip_gap=None):
+    """Solves with PuLP and the CBC command line solver."""
+    return _solve_with_template(
+        "cbc", _CbcTemplate, problem, relax_first, time_limit, mip_gap)
+
+
+def _solve_highs(problem, relax_first=False, time_limit=None, mip_gap=None):
+    """Solves in-process with SciPy's HiGHS interface."""
+    return _solve_with_template(
+        "highs", _HighsTemplate, problem, relax_first, time_limit, mip_gap)
+
+
+def _solve_with_template(backend, template_class, problem, relax_first, time_limit, mip_gap):
+    start_time = time.perf_counter()
+    template, built = _template_cache.get(backend, template_class, problem)
+    build_ms = (time.perf_counter() - start_time) * 1000
+    if time_limit is not None:
+        time_limit = max(time_limit - build_ms / 1000, 0.0)
+    start_time = time.perf_counter()
+    result = template.solve(problem, relax_first, time_limit, mip_gap)
+    solve_ms = (time.perf_counter() - start_time) * 1000
+    PHASE_SECONDS.observe(build_ms / 1000, phase="model_build")
+    PHASE_SECONDS.observe(solve_ms / 1000, phase="solve")
+    logger.debug(
+        f"Solver backend {backend}: model {'built' if built else 'reused'} in "
+        f"{build_ms:.1f} ms, solved ({result.method}) in {solve_ms:.1f} ms")
+    return result
+
+
+SOLVER_BACKENDS = {
+    "highs": _solve_highs,
+    "cbc": _solve_cbc,
+}
+
+# In-process HiGHS when SciPy is installed, otherwise the CBC command line
+DEFAULT_SOLVER_BACKEND = os.environ.get(
+    "SOLVER_BACKEND", "highs" if milp is not None else "cbc").lower()
+
+
+def solve_problem(problem, solver_backend=None, relax_first=None,
+                  time_limit=None, mip_gap=None):
+    """
+    Solves a BatteryProblem with the requested backend, falling back to CBC
+    if the backend is unavailable or fails.
+
+    With `relax_first` (default LP_RELAXATION_FIRST) the LP relaxation is
+    solved first and the MILP only if the relaxation is not integral.
+    `time_limit` (seconds, default SOLVER_TIME_LIMIT_SECONDS) bounds the
+    whole solve; `mip_gap` defaults to SOLVER_MIP_GAP.
+
+    Returns:
+        SolveResult
+    """
+    backend = (solver_backend or DEFAULT_SOLVER_BACKEND).lower()
+    if backend not in SOLVER_BACKENDS:
+        logger.warning(f"Unknown solver backend '{backend}', using cbc")
+        backend = "cbc"
+    if backend == "highs" and milp is None:
+        logger.warning("SciPy is not installed, using cbc instead of highs")
+        backend = "cbc"
+
+    if relax_first is None:
+        relax_first = LP_RELAXATION_FIRST
+    if time_limit is None:
+        time_limit = SOLVER_TIME_LIMIT_SECONDS
+    if mip_gap is None:
+        mip_gap = SOLVER_MIP_GAP
+
+    start_time = time.perf_counter()
+    try:
+        result = SOLVER_BACKENDS[backend](problem, relax_first, time_limit, mip_gap)
+    except Exception as e:
+        if backend == "cbc":
+            raise
+        logger.error(f"Solver backend {backend} failed ({e}), falling back to cbc")
+        backend = "cbc"
+        if time_limit is not None:
+            time_limit = max(time_limit - (time.perf_counter() - start_time), 0.0)
+        start_time = time.perf_counter()
+        result = _solve_cbc(problem, relax_first, time_limit, mip_gap)
+    logger.info(
+        f"Solver backend {backend} ({result.method}): {result.status_string} in "
+        f"{(time.perf_counter() - start_time) * 1000:.1f} ms ({problem.horizon} steps)")
+    return result
+
+
+def solve_compressed(problem, compression_tolerance=None, solver_backend=None,
+                     time_limit=None, mip_gap=None):
+    """
+    Solves `problem` on a compressed horizon (if that saves any steps) and
+    expands the solution back to per-step values.
+
+    Returns:
+        SolveResult
+    """
+    if compression_tolerance is None:
+        compression_tolerance = COMPRESSION_PRICE_TOLERANCE
+    if compression_tolerance <= 0:
+        return solve_problem(problem, solver_backend, time_limit=time_limit, mip_gap=mip_gap)
+
+    compressed, block_lengths = compress_problem(problem, compression_tolerance)
+    if compressed.horizon == problem.horizon:
+        return solve_problem(problem, solver_backend, time_limit=time_limit, mip_gap=mip_gap)
+    logger.info(
+        f"Horizon compressed from {problem.horizon} to {compressed.horizon} steps "
+        f"(ratio {problem.horizon / compressed.horizon:.2f}, price tolerance {compression_tolerance})")
+    return expand_solution(
+        problem, block_lengths,
+        solve_problem(compressed, solver_backend, time_limit=time_limit, mip_gap=mip_gap))
+
+
+def heuristic_fallback(problem):
+    """
+    Plan used when the solver ran out of time without any solution: the DP
+    rollout, which takes milliseconds regardless of the prices.
+
+    Returns:
+        SolveResult: status "Heuristic", or "Not Solved" if the DP fails too.
+    """
+    # dp_optimizer imports this module, so it is imported on first use
+    from dp_optimizer import solve_value_function
+
+    try:
+        value_function = solve_value_function(problem)
+        charges, discharges, socs = value_function.rollout(problem.initial_soc_kwh)
+    except Exception as e:
+        logger.error(f"Heuristic fallback failed: {e}")
+        return SolveResult("Not Solved")
+    objective = float(np.dot(np.asarray(discharges) - np.asarray(charges), problem.prices))
+    return SolveResult("Heuristic", charges, discharges, socs, objective, "dp")
+
+
+def run_optimization(
+    forecast_data, initial_soc_percent, current_time_index, battery_params,
+    solver_backend=None, compression_tolerance=None, time_limit=None, mip_gap=None,
+):
+    """
+    Runs the battery schedule optimization.
+
+    Args:
+        forecast_data (Forecast | str): Parsed forecast or the JSON
+                              string containing the forecast data.
+        initial_soc_percent (float): Current battery SOC (0-100).
+        current_time_index (int): The starting index in the forecast data.
+        battery_params (dict): Dictionary with battery parameters like
+                               'capacity_kwh', 'max_charge_rate_kw', 'max_discharge_rate_kw',
+                               'min_soc_percent', 'efficiency_roundtrip' and
+                               optionally 'step_hours' (forecast step duration,
+                               default DEFAULT_STEP_HOURS).
+        solver_backend (str): "highs" (in-process, SciPy) or "cbc" (PuLP).
+                              Defaults to DEFAULT_SOLVER_BACKEND.
+        compression_tolerance (float): Merge adjacent steps whose prices
+                              differ by at most this much before solving
+                              (see compress_problem). Defaults to
+                              COMPRESSION_PRICE_TOLERANCE, 0 disables it.
+        time_limit (float): Latency budget of the solve in seconds. Defaults
+                              to SOLVER_TIME_LIMIT_SECONDS.
+        mip_gap (float): Relative MIP gap. Defaults to SOLVER_MIP_GAP.
+
+    Returns:
+        tuple: (status_string, results | None, action_now | None, total_savings | None)
+               Returns optimization status, the schedule as a ScheduleResult
+               (call `results.to_dataframe()` for pandas), the action for the
+               immediate next hour, and total savings.
+               The status is one of USABLE_STATUSES ("Optimal", "Incumbent"
+               when the time limit stopped the solver, "Heuristic" when it
+               stopped without a solution or the DP plan beat the incumbent).
+               Returns None for results, action, and savings if optimization fails.
+    """
+    problem, error = prepare_problem(
+        forecast_data, initial_soc_percent, current_time_index, battery_params
+    )
+    if error:
+        return error, None, None, None
+    problem.log_parameters()
+
+    # Solve the Problem
+    logger.info("Solving the optimization problem...")
+    result = solve_compressed(
+        problem, compression_tolerance, solver_backend, time_limit, mip_gap)
+    status_string = result.status_string
+    logger.info(f"Solver Status: {status_string}")
+
+    if status_string == "Not Solved":
+        logger.warning("Solver time limit reached without a solution, using the DP plan.")
+        result = heuristic_fallback(problem)
+        status_string = result.status_string
+    elif status_string == "Incumbent":
+        # An early incumbent can be far from optimal; keep the better plan
+        heuristic = heuristic_fallback(problem)
+        if heuristic.objective is not None and heuristic.objective > result.objective:
+            logger.warning(
+                f"Solver time limit reached, DP plan ({heuristic.objective:.4f}) beats "
+                f"the incumbent ({result.objective:.4f}).")
+            result = heuristic
+            status_string = result.status_string
+
+    if status_string in USABLE_STATUSES:
+        total_savings = result.objective
+        logger.info(
+            f"{status_string} Schedule Found! Max Savings: {total_savings:.4f}")
 
-        results_df = pd.DataFrame(results)
-        logger.debug("--- Optimal Plan Generated ---")
-        return status_string, results_df, action_now, total_savings
+        results, action_now = build_results(
+            problem, result.charges, result.discharges, result.socs)
+        return status_string, results, action_now, total_savings
 
     else:
         logger.warning(
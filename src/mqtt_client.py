@@ -0,0 +1,85 @@
+# mqtt_client.py
+import logging
+import os
+import threading
+
+import paho.mqtt.client as mqtt
+
+logger = logging.getLogger(__name__)
+
+
+class MqttClient:
+    """
+    Long-lived MQTT client running paho's network loop in a background thread.
+
+    `start()` connects asynchronously and paho reconnects with exponential
+    backoff between `reconnect_min_delay` and `reconnect_max_delay` seconds,
+    the first connection included, so the app starts even if the broker is
+    not reachable yet.
+
+    Subclasses set `name` (used in log messages) and `client_id_prefix`, and
+    extend the paho callbacks on `self._client`.
+    """
+
+    name = "client"
+    client_id_prefix = "flask-optimizer"
+
+    def __init__(
+        self,
+        broker,
+        port,
+        topic,
+        username=None,
+        password=None,
+        reconnect_min_delay=1,
+        reconnect_max_delay=60,
+    ):
+        self.broker = broker
+        self.port = port
+        self.topic = topic
+        self._lock = threading.Lock()
+        self._started = False
+
+        client_id = f"{self.client_id_prefix}-{os.getpid()}"
+        self._client = mqtt.Client(client_id=client_id)
+        self._client.on_connect = self._on_connect
+        self._client.on_disconnect = self._on_disconnect
+        self._client.reconnect_delay_set(
+            min_delay=reconnect_min_delay, max_delay=reconnect_max_delay)
+
+        if username:
+            self._client.username_pw_set(username, password)
+            logger.info(f"MQTT {self.name}: Using username/password.")
+
+    def start(self):
+        """Connect asynchronously and start the background network loop."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        logger.info(
+            f"Starting MQTT {self.name}: {self.broker}:{self.port} Topic: {self.topic}")
+        self._client.connect_async(self.broker, self.port, 60)
+        self._client.loop_start()
+
+    def stop(self):
+        with self._lock:
+            if not self._started:
+                return
+            self._started = False
+        self._client.disconnect()
+        self._client.loop_stop()
+        logger.info(f"MQTT {self.name} stopped.")
+
+    # --- paho callbacks (run on the network thread) ---
+
+    def _on_connect(self, client, userdata, flags, rc):
+        if rc == 0:
+            logger.info(f"MQTT {self.name} connected.")
+        else:
+            logger.error(f"MQTT {self.name} connection failed with code {rc}")
+
+    def _on_disconnect(self, client, userdata, rc):
+        if rc != 0:
+            logger.warning(
+                f"MQTT {self.name} disconnected unexpectedly (code {rc}), reconnecting...")
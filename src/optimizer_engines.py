@@ -0,0 +1,21 @@
+# optimizer_engines.py
+from linear_optimizer import run_optimization
+from dp_optimizer import run_dp_optimization
+from heuristic_optimizer import run_heuristic_optimization
+
+# All engines share the signature and return value of run_optimization:
+# (forecast_data, initial_soc_percent, current_time_index, battery_params)
+# -> (status_string, results, action_now, total_savings)
+# where forecast_data is a Forecast or its raw JSON payload.
+ENGINES = {
+    "milp": run_optimization,
+    "dp": run_dp_optimization,
+    "heuristic": run_heuristic_optimization,
+}
+
+DEFAULT_ENGINE = "milp"
+
+
+def get_engine(name):
+    """Returns the optimizer function for `name` or None if unknown."""
+    return ENGINES.get((name or DEFAULT_ENGINE).lower())
@@ -0,0 +1,93 @@
+# result_cache.py
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def soc_bucket(soc_percent, quantization_percent):
+    """Rounds an SOC (0-100) to the nearest multiple of `quantization_percent`."""
+    soc_percent = float(soc_percent)
+    if not quantization_percent:
+        return soc_percent
+    return round(round(soc_percent / quantization_percent) * quantization_percent, 6)
+
+
+def _canonical(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def make_key(forecast_hash, current_time_index, soc_percent, battery_params, engine):
+    """
+    Cache key for one solve. `battery_params` is canonicalized (sorted keys,
+    values as floats) so equivalent dicts map to the same entry.
+    """
+    params = json.dumps(
+        {k: _canonical(v) for k, v in battery_params.items()}, sort_keys=True,
+        default=str)
+    params_hash = hashlib.sha256(params.encode('utf-8')).hexdigest()
+    return (forecast_hash, int(current_time_index), float(soc_percent), params_hash, engine)
+
+
+class SolverResultCache:
+    """
+    Bounded LRU cache with a time-to-live for optimizer results.
+
+    Thread-safe; results are stored as returned by the optimizer and must be
+    treated as read-only by callers.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=900):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]  # expired
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drops all entries, e.g. when a new forecast arrives."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
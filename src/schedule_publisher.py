@@ -0,0 +1,110 @@
+# schedule_publisher.py
+import logging
+from collections import OrderedDict
+
+import paho.mqtt.client as mqtt
+
+from mqtt_client import MqttClient
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = "Queued"
+STATUS_PUBLISHED = "Published"
+STATUS_FAILED = "Failed"
+STATUS_UNCHANGED = "Skipped: Unchanged"
+
+
+class SchedulePublisher(MqttClient):
+    """
+    Long-lived MQTT client that publishes schedules without blocking requests.
+
+    `publish()` hands the payload to paho's outbound queue and returns its
+    message id immediately; paho's network thread sends it (and re-sends
+    QoS > 0 messages queued while disconnected after reconnecting with
+    exponential backoff). Delivery is tracked per message id and can be
+    queried with `get_status()`.
+
+    Schedules are published retained by default, so a subscriber that
+    (re)connects gets the current plan at once. A schedule whose hash equals
+    the last queued one is not published again.
+    """
+
+    name = "schedule publisher"
+    client_id_prefix = "flask-optimizer-publisher"
+
+    def __init__(
+        self,
+        broker,
+        port,
+        topic,
+        username=None,
+        password=None,
+        qos=1,
+        retain=True,
+        max_queued_messages=100,
+        max_tracked_messages=1000,
+        reconnect_min_delay=1,
+        reconnect_max_delay=60,
+    ):
+        super().__init__(broker, port, topic, username, password,
+                         reconnect_min_delay, reconnect_max_delay)
+        self.qos = qos
+        self.retain = retain
+        self.max_tracked_messages = max_tracked_messages
+        self._statuses = OrderedDict()  # mid -> status string
+        self._last_hash = None
+        self._last_mid = None
+
+        self._client.on_publish = self._on_publish
+        self._client.max_queued_messages_set(max_queued_messages)
+
+    def publish(self, payload, schedule_hash=None):
+        """
+        Enqueues `payload` for the schedule topic unless `schedule_hash`
+        matches the previously queued schedule.
+
+        Returns:
+            tuple: (message_id | None, status_string)
+                   For unchanged schedules the id of the last publish.
+        """
+        with self._lock:
+            if schedule_hash is not None and schedule_hash == self._last_hash:
+                logger.debug("Schedule unchanged, skipping MQTT publish.")
+                return self._last_mid, STATUS_UNCHANGED
+
+        try:
+            info = self._client.publish(
+                self.topic, payload, qos=self.qos, retain=self.retain)
+        except Exception as e:
+            logger.error(f"Error queueing schedule for MQTT: {e}")
+            return None, f"{STATUS_FAILED}: {e}"
+        if info.rc == mqtt.MQTT_ERR_NO_CONN and self.qos == 0:
+            # QoS 0 messages are dropped while disconnected
+            return None, f"{STATUS_FAILED}: {mqtt.error_string(info.rc)}"
+        if info.rc not in (mqtt.MQTT_ERR_SUCCESS, mqtt.MQTT_ERR_NO_CONN):
+            return None, f"{STATUS_FAILED}: {mqtt.error_string(info.rc)}"
+
+        # Not holding the lock around client.publish(): paho calls on_publish
+        # with its own message mutex held. on_publish may therefore already
+        # have marked this mid as published, which setdefault keeps.
+        with self._lock:
+            status = self._statuses.setdefault(info.mid, STATUS_QUEUED)
+            self._last_hash = schedule_hash
+            self._last_mid = info.mid
+            while len(self._statuses) > self.max_tracked_messages:
+                self._statuses.popitem(last=False)
+        return info.mid, status
+
+    def get_status(self, message_id):
+        """Delivery status of a message id (None if unknown or expired)."""
+        with self._lock:
+            return self._statuses.get(message_id)
+
+    # --- paho callbacks (run on the network thread) ---
+
+    def _on_publish(self, client, userdata, mid):
+        with self._lock:
+            self._statuses[mid] = STATUS_PUBLISHED
+            while len(self._statuses) > self.max_tracked_messages:
+                self._statuses.popitem(last=False)
+        logger.debug(f"MQTT schedule message {mid} published.")
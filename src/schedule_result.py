@@ -0,0 +1,155 @@
+# schedule_result.py
+import hashlib
+import json
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Energies below this (kWh) are treated as "Hold"
+ACTION_THRESHOLD_KWH = 0.01
+
+
+class ScheduleResult:
+    """
+    Columnar schedule of one optimization run.
+
+    Every column is a NumPy array aligned with the optimization horizon. The
+    schedule serializes straight from the arrays to the HTTP response and the
+    MQTT payload; a pandas DataFrame is only built by `to_dataframe()`.
+    """
+
+    def __init__(self, index, hour, date, price, charge, discharge, soc_kwh,
+                 capacity_kwh, max_charge_energy_per_step,
+                 max_discharge_energy_per_step, step_hours=1.0):
+        self.index = index
+        self.hour = hour
+        self.date = date
+        self.price = price
+        self.charge = charge  # kWh, >= 0
+        self.discharge = discharge  # kWh, >= 0
+        self.step_hours = step_hours
+
+        is_charge = charge > ACTION_THRESHOLD_KWH
+        is_discharge = ~is_charge & (discharge > ACTION_THRESHOLD_KWH)
+        # Signed energy: charge positive, discharge negative, hold zero
+        self.energy = np.where(
+            is_charge, charge, np.where(is_discharge, -discharge, 0.0))
+        charge_rate = (charge / max_charge_energy_per_step
+                       if max_charge_energy_per_step > 0 else np.zeros_like(charge))
+        discharge_rate = (-discharge / max_discharge_energy_per_step
+                          if max_discharge_energy_per_step > 0 else np.zeros_like(discharge))
+        self.change_rate = np.where(
+            is_charge, charge_rate, np.where(is_discharge, discharge_rate, 0.0))
+        self.action = np.where(
+            is_charge, "Charge", np.where(is_discharge, "Discharge", "Hold"))
+        self.soc_percent = soc_kwh / capacity_kwh * 100.0
+        self.hourly_saving = (discharge - charge) * price
+        self.cumulative_saving = np.cumsum(self.hourly_saving)
+
+    @classmethod
+    def from_solution(cls, problem, charges, discharges, socs):
+        """
+        Args:
+            problem (BatteryProblem): The solved problem.
+            charges, discharges, socs (sequence[float | None]): Per-step
+                charge and discharge energy (kWh, both >= 0) and end-of-step
+                SOC (kWh). Missing values (None/NaN) count as zero energy and
+                minimum SOC.
+        """
+        charge = np.nan_to_num(np.asarray(charges, dtype=np.float64))
+        discharge = np.nan_to_num(np.asarray(discharges, dtype=np.float64))
+        soc_kwh = np.asarray(socs, dtype=np.float64)
+        soc_kwh = np.where(np.isnan(soc_kwh) | (soc_kwh == 0),
+                           problem.min_soc_kwh, soc_kwh)
+        return cls(
+            index=np.asarray(problem.indices, dtype=np.int64),
+            hour=np.asarray(problem.hours, dtype=np.int64),
+            date=np.asarray(problem.dates, dtype=object),
+            price=np.asarray(problem.prices, dtype=np.float64),
+            charge=charge,
+            discharge=discharge,
+            soc_kwh=soc_kwh,
+            capacity_kwh=problem.capacity_kwh,
+            max_charge_energy_per_step=problem.max_charge_energy_per_step,
+            max_discharge_energy_per_step=problem.max_discharge_energy_per_step,
+            step_hours=problem.step_hours,
+        )
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def action_now(self):
+        """
+        Average power (kW) of the first step: charge > 0, discharge < 0,
+        hold 0. Equals its energy (kWh) for one-hour steps.
+        """
+        if self.charge[0] > ACTION_THRESHOLD_KWH:
+            return float(self.charge[0]) / self.step_hours
+        if self.discharge[0] > ACTION_THRESHOLD_KWH:
+            return -1 * float(self.discharge[0]) / self.step_hours
+        return 0
+
+    def change_rate_strings(self):
+        return np.char.mod("%.2f", self.change_rate)
+
+    def plan_summary(self, steps=12):
+        """Human readable plan of the first `steps` steps, for logging."""
+        plan = []
+        for hour, action, charge, discharge in zip(
+                self.hour[:steps].tolist(), self.action[:steps].tolist(),
+                self.charge[:steps].tolist(), self.discharge[:steps].tolist()):
+            if action == "Charge":
+                plan.append(f"Hour {hour}: Charge {charge:.2f} kWh")
+            elif action == "Discharge":
+                plan.append(f"Hour {hour}: Discharge {discharge:.2f} kWh")
+            else:
+                plan.append(f"Hour {hour}: Hold")
+        return " | ".join(plan)
+
+    def change_hash(self):
+        """Hash of the (index, changeRate) pairs, i.e. of what the controller acts on."""
+        pairs = [self.index.tolist(), self.change_rate_strings().tolist()]
+        return hashlib.sha256(json.dumps(pairs).encode('utf-8')).hexdigest()
+
+    def to_records(self):
+        """Per-hour objects as published to MQTT ("records" format)."""
+        return [
+            {"index": index, "hour": hour, "date": date, "changeRate": rate}
+            for index, hour, date, rate in zip(
+                self.index.tolist(), self.hour.tolist(), self.date.tolist(),
+                self.change_rate_strings().tolist())
+        ]
+
+    def to_columns(self):
+        """One list per field ("columnar" format, changeRate as numbers)."""
+        return {
+            "index": self.index.tolist(),
+            "hour": self.hour.tolist(),
+            "date": self.date.tolist(),
+            "changeRate": np.round(self.change_rate, 2).tolist(),
+        }
+
+    def to_mqtt_payload(self, payload_format="records"):
+        if payload_format == "columnar":
+            return json.dumps(self.to_columns(), separators=(",", ":"))
+        return json.dumps({"data": self.to_records()})
+
+    def to_dataframe(self):
+        """Materializes the schedule as the DataFrame returned by earlier versions."""
+        import pandas as pd
+
+        return pd.DataFrame({
+            "Index": self.index,
+            "Hour": self.hour,
+            "Date": self.date,
+            "Price": self.price,
+            "Action": self.action,
+            "Energy_kWh": np.round(self.energy, 4),
+            "ChangeRate": self.change_rate_strings(),
+            "SOC_End_Percent": np.round(self.soc_percent, 2),
+            "Hourly_Saving": np.round(self.hourly_saving, 4),
+            "Cumulative_Saving": np.round(self.cumulative_saving, 4),
+        })
@@ -0,0 +1,72 @@
+# solver_gate.py
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+REJECTED_QUEUE_FULL = "queue_full"
+REJECTED_TIMEOUT = "timeout"
+
+
+class SolverGate:
+    """
+    Bounds the number of concurrent solves in this process.
+
+    Up to `max_concurrent` callers solve at once, up to `max_queued` more
+    wait for a slot for at most `queue_timeout` seconds. Callers beyond that
+    are rejected at once, so a saturated worker answers quickly (429/503 with
+    Retry-After) instead of piling up request threads and CBC processes.
+    """
+
+    def __init__(self, max_concurrent=2, max_queued=16, queue_timeout=5.0):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self._active = 0
+        self._queued = 0
+        self.admitted = 0
+        self.rejected = {REJECTED_QUEUE_FULL: 0, REJECTED_TIMEOUT: 0}
+
+    def acquire(self):
+        """
+        Waits for a solver slot. Every successful call must be paired with
+        `release()`.
+
+        Returns:
+            tuple: (admitted, rejection_reason | None) with reason
+                   REJECTED_QUEUE_FULL or REJECTED_TIMEOUT.
+        """
+        with self._condition:
+            if self._active >= self.max_concurrent:
+                if self._queued >= self.max_queued:
+                    self.rejected[REJECTED_QUEUE_FULL] += 1
+                    return False, REJECTED_QUEUE_FULL
+                self._queued += 1
+                try:
+                    admitted = self._condition.wait_for(
+                        lambda: self._active < self.max_concurrent, timeout=self.queue_timeout)
+                finally:
+                    self._queued -= 1
+                if not admitted:
+                    self.rejected[REJECTED_TIMEOUT] += 1
+                    return False, REJECTED_TIMEOUT
+            self._active += 1
+            self.admitted += 1
+            return True, None
+
+    def release(self):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            return {
+                "active": self._active,
+                "queued": self._queued,
+                "max_concurrent": self.max_concurrent,
+                "max_queued": self.max_queued,
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected),
+            }
@@ -0,0 +1,15 @@
+# wsgi.py
+"""
+Production entry point:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every gunicorn worker imports the app itself (no preload), so each worker
+process has its own MQTT forecast subscriber and schedule publisher, and its
+request threads share that worker's cached forecast, policy table and result
+cache. Solves per worker are bounded by SOLVER_MAX_CONCURRENCY.
+"""
+from app import app, start_mqtt_clients
+
+start_mqtt_clients()
+application = app
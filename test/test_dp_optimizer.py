@@ -0,0 +1,41 @@
+import glob
+import itertools
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+
+from dp_optimizer import (  # noqa: E402
+    MILP_ABSOLUTE_TOLERANCE, MILP_RELATIVE_TOLERANCE, run_dp_optimization)
+from linear_optimizer import run_optimization  # noqa: E402
+
+BATTERY_PARAMS = [
+    {'capacity_kwh': 7.4, 'max_charge_rate_kw': 1.2, 'max_discharge_rate_kw': 0.8,
+     'min_soc_percent': 10, 'efficiency_roundtrip': 0.90},
+    {'capacity_kwh': 10.0, 'max_charge_rate_kw': 2.0, 'max_discharge_rate_kw': 0.5,
+     'min_soc_percent': 15, 'efficiency_roundtrip': 0.88},
+    {'capacity_kwh': 7.6, 'max_charge_rate_kw': 1.2, 'max_discharge_rate_kw': 1.2,
+     'min_soc_percent': 5, 'efficiency_roundtrip': 0.94},
+]
+PRICE_FILES = sorted(glob.glob(os.path.join(REPO_ROOT, "data", "**", "electricity_prices*"),
+                               recursive=True))
+
+
+@pytest.mark.parametrize("path", PRICE_FILES, ids=os.path.basename)
+def test_dp_savings_within_tolerance_of_milp(path):
+    with open(path) as f:
+        forecast_json = f.read()
+    for params, soc, index in itertools.product(BATTERY_PARAMS, (0, 33, 80), (0, 5, 18)):
+        milp_status, _, _, milp_savings = run_optimization(forecast_json, soc, index, params)
+        dp_status, _, _, dp_savings = run_dp_optimization(forecast_json, soc, index, params)
+        if milp_status != "Optimal":
+            assert dp_savings is None
+            continue
+        assert dp_status == "Approximate"
+        # The DP schedule is feasible, so it never beats the MILP optimum
+        assert dp_savings <= milp_savings + 1e-6
+        assert milp_savings - dp_savings <= max(
+            MILP_RELATIVE_TOLERANCE * abs(milp_savings), MILP_ABSOLUTE_TOLERANCE)
@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import linear_optimizer  # noqa: E402
+from linear_optimizer import SolveResult, run_optimization  # noqa: E402
+
+BATTERY_PARAMS = {
+    "capacity_kwh": 7.4,
+    "max_charge_rate_kw": 2.0,
+    "max_discharge_rate_kw": 2.0,
+    "min_soc_percent": 10,
+    "efficiency_roundtrip": 0.9,
+}
+
+
+def step_forecast(block_prices, block_length=12):
+    """Forecast of len(block_prices) constant-price blocks of `block_length` hours."""
+    prices = np.repeat(block_prices, block_length)
+    return {"data": [
+        {"index": i, "hour": i % 24, "date": "2025-02-15", "adjustedPrice": str(price)}
+        for i, price in enumerate(prices)
+    ]}
+
+
+def test_incumbent_of_compressed_solve_is_expanded(monkeypatch):
+    forecast = step_forecast([0.10, 0.40, 0.10, 0.40])
+    solved_horizons = []
+
+    def time_limited_solve(problem, *args, **kwargs):
+        # The time limit stopped the solver with a (block) solution
+        solved_horizons.append(problem.horizon)
+        zeros = np.zeros(problem.horizon)
+        socs = np.full(problem.horizon, problem.initial_soc_kwh)
+        return SolveResult("Incumbent", zeros, zeros, socs, objective=1.0)
+
+    def worse_dp_plan(problem):
+        zeros = np.zeros(problem.horizon)
+        socs = np.full(problem.horizon, problem.initial_soc_kwh)
+        return SolveResult("Heuristic", zeros, zeros, socs, objective=0.0, method="dp")
+
+    monkeypatch.setattr(linear_optimizer, "solve_problem", time_limited_solve)
+    monkeypatch.setattr(linear_optimizer, "heuristic_fallback", worse_dp_plan)
+
+    status, results, action_now, savings = run_optimization(
+        forecast, 50, 0, BATTERY_PARAMS, compression_tolerance=0.05, time_limit=1)
+
+    assert solved_horizons == [4]
+    assert status == "Incumbent"
+    assert savings == 1.0
+    assert len(results.to_dataframe()) == 48
+    assert action_now is not None
+
+
+def test_action_now_is_power_for_sub_hourly_steps():
+    forecast = step_forecast([0.10, 0.40], block_length=4)
+    battery_params = dict(BATTERY_PARAMS, max_charge_rate_kw=1.2, step_hours=0.25)
+
+    status, results, action_now, _ = run_optimization(forecast, 10, 0, battery_params)
+
+    assert status == "Optimal"
+    assert results.charge[0] == pytest.approx(0.3)  # kWh in 15 minutes
+    assert action_now == pytest.approx(1.2)  # kW
+
+
+@pytest.mark.parametrize("template_class", [
+    linear_optimizer._HighsTemplate, linear_optimizer._CbcTemplate])
+def test_spent_time_limit_skips_lp_relaxation(template_class, monkeypatch):
+    forecast = step_forecast([0.10, 0.40, 0.10, 0.40])
+    problem, error = linear_optimizer.prepare_problem(forecast, 50, 0, BATTERY_PARAMS)
+    assert error is None
+    template = template_class(problem)
+    solver_calls = []
+
+    def record_solve(self, *args):
+        solver_calls.append(args)
+        return SolveResult("Optimal")
+
+    # The budget runs out between entering solve() and the relaxation; a
+    # negative time limit would mean no limit to the solver
+    monkeypatch.setattr(linear_optimizer, "_deadline", lambda time_limit: time.perf_counter() - 1)
+    monkeypatch.setattr(template_class, "_solve_once", record_solve)
+    result = template.solve(problem, relax_first=True, time_limit=1e-6)
+
+    assert result.status_string == "Not Solved"
+    assert solver_calls == []